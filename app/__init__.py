@@ -6,7 +6,7 @@ from .models import db
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
-    CORS(app)
+    CORS(app, expose_headers=["X-Next-Cursor"])
 
     db.init_app(app)
 
@@ -17,13 +17,26 @@ def create_app():
         from .routes.appointments import appointments_bp
         from .routes.admin import admin_bp
         from app.routes.availability import availability_bp
+        from .routes.metrics import metrics_bp
+        from .routes.feed import feed_bp
         app.register_blueprint(tenants_bp, url_prefix="/tenants")
         app.register_blueprint(services_bp, url_prefix="/services")
         app.register_blueprint(customers_bp, url_prefix="/customers")
         app.register_blueprint(appointments_bp, url_prefix="/appointments")
         app.register_blueprint(admin_bp, url_prefix="/admin")
         app.register_blueprint(availability_bp)
+        app.register_blueprint(metrics_bp)
+        app.register_blueprint(feed_bp, url_prefix="/feed")
 
-        db.create_all()
+        from .utils.metrics import init_metrics
+        init_metrics(app, *db.engines.values())
+
+        from .utils.replicas import init_replicas
+        init_replicas(app)
+
+        from .utils.limits import init_limits
+        init_limits(app)
+
+    # El esquema lo manejan las migraciones de alembic (app/migrate.py)
 
     return app
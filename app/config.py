@@ -1,5 +1,123 @@
 import os
 
+# Workers/threads del servidor (gunicorn.conf.py los lee de aquí también)
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+WEB_THREADS = int(os.getenv("WEB_THREADS", "4"))
+
+# Conexiones de Postgres que le tocan a este contenedor (su parte de
+# max_connections) y cuántas dejamos libres para migraciones, psql, etc.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+# Conexiones por proceso fuera del pool: el LISTEN del feed
+# (utils/feed.PgListener) en cada worker web. El worker de la cola no
+# escucha y pone 0.
+DB_LISTENER_CONNECTIONS = int(os.getenv("DB_LISTENER_CONNECTIONS", "1"))
+
+
+def engine_options(url, workers=WEB_WORKERS, threads=WEB_THREADS, listeners=DB_LISTENER_CONNECTIONS):
+    """
+    Opciones del pool de SQLAlchemy para un proceso.
+
+    Cada worker tiene su propio pool, así que el presupuesto de conexiones
+    se reparte entre los workers: pool_size + max_overflow + `listeners`
+    por worker nunca pasa de (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS)
+    / workers.
+    """
+    if not url or not url.startswith("postgresql"):
+        return {}
+
+    budget = max(1, (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // max(1, workers) - listeners)
+    pool_size = min(threads, budget)
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": budget - pool_size,
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "connect_args": {
+            "options": f"-c statement_timeout={os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000')}",
+        },
+    }
+
+
+def replica_binds(urls):
+    """
+    SQLALCHEMY_BINDS para las réplicas de lectura (DATABASE_REPLICA_URLS,
+    separadas por coma): replica0, replica1, ... Cada una con su pool.
+    """
+    urls = [u.strip() for u in (urls or "").split(",") if u.strip()]
+    # el LISTEN del feed va a la primaria, no a las réplicas
+    return {f"replica{i}": {"url": url, **engine_options(url, listeners=0)} for i, url in enumerate(urls)}
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Réplicas de solo lectura (ver utils/replicas.py). Después de escribir,
+    # el tenant lee de la primaria REPLICA_READ_YOUR_WRITES_SECONDS; una
+    # réplica que no conecta se salta REPLICA_RETRY_SECONDS.
+    SQLALCHEMY_BINDS = replica_binds(os.getenv("DATABASE_REPLICA_URLS"))
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", "5"))
+    REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+    # Caché de tenants en memoria (ver utils/tenants.TenantCache)
+    TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "1024"))
+    TENANT_CACHE_TTL = int(os.getenv("TENANT_CACHE_TTL", "60"))
+    # cada cuánto se compara una entrada con la versión del tenant en la BD
+    # (cambios hechos en otro worker tardan a lo más esto en notarse)
+    TENANT_CACHE_RECHECK = float(os.getenv("TENANT_CACHE_RECHECK", "2"))
+
+    # /metrics (ver utils/metrics.Metrics)
+    METRICS_MAX_TENANTS = int(os.getenv("METRICS_MAX_TENANTS", "20"))
+    SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "200"))
+
+    # Cola de trabajos en segundo plano (ver utils/jobs.py y app/worker.py)
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_BACKOFF_SECONDS = int(os.getenv("JOB_BACKOFF_SECONDS", "30"))
+    JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600"))
+    WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "2"))
+
+    # Tombstones de citas borradas para /admin/appointments/changes; un
+    # cursor más viejo que esto tiene que recargar todo
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "90"))
+
+    # Feed de cambios por SSE (ver utils/feed.py). Con workers gthread cada
+    # cliente conectado ocupa un hilo mientras está abierto, así que el tope
+    # es POR WORKER: en el backend normal son WEB_THREADS - 1 (queda un hilo
+    # para lo demás), o sea pocos suscriptores. Para muchos, /feed/ se
+    # sirve desde el servicio "feed" (docker-compose.yml), el mismo app con
+    # muchos hilos y pocas conexiones a la BD: los streams no usan la BD.
+    # Las conexiones se cierran a los FEED_MAX_SECONDS y el navegador
+    # (EventSource) reconecta solo.
+    FEED_MAX_STREAMS = int(os.getenv("FEED_MAX_STREAMS", str(max(1, WEB_THREADS - 1))))
+    FEED_KEEPALIVE_SECONDS = int(os.getenv("FEED_KEEPALIVE_SECONDS", "15"))
+    FEED_MAX_SECONDS = int(os.getenv("FEED_MAX_SECONDS", "300"))
+
+    # Endpoints públicos (ver utils/limits.py): token bucket por cliente (IP)
+    # y por tenant, en requests por minuto con su ráfaga; 0 lo apaga. A lo
+    # más PUBLIC_MAX_CONCURRENT requests públicos a la vez por worker (el
+    # resto recibe 503) para que siempre quede un hilo y una conexión del
+    # pool para el admin. RATE_LIMIT_BACKEND=redis comparte los contadores
+    # entre workers (pip install redis); si Redis falla se cuenta en
+    # memoria durante RATE_LIMIT_RETRY_SECONDS.
+    RATE_LIMIT_CLIENT_PER_MINUTE = int(os.getenv("RATE_LIMIT_CLIENT_PER_MINUTE", "120"))
+    RATE_LIMIT_CLIENT_BURST = int(os.getenv("RATE_LIMIT_CLIENT_BURST", "30"))
+    RATE_LIMIT_TENANT_PER_MINUTE = int(os.getenv("RATE_LIMIT_TENANT_PER_MINUTE", "1200"))
+    RATE_LIMIT_TENANT_BURST = int(os.getenv("RATE_LIMIT_TENANT_BURST", "200"))
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_RETRY_SECONDS = int(os.getenv("RATE_LIMIT_RETRY_SECONDS", "30"))
+    PUBLIC_MAX_CONCURRENT = int(os.getenv("PUBLIC_MAX_CONCURRENT", str(max(1, WEB_THREADS - 1))))
+
+    # Recordatorios (ver utils/reminders.py). Las citas se guardan en hora
+    # local del negocio; REMINDER_TIMEZONE (nombre IANA, p. ej.
+    # America/Tijuana) dice cuál es, sin depender de la zona del servidor.
+    # Por omisión UTC, igual que el "hoy" del resto de la app.
+    REMINDER_TIMEZONE = os.getenv("REMINDER_TIMEZONE", "UTC")
+    REMINDER_HOURS = int(os.getenv("REMINDER_HOURS", "24"))
+    REMINDER_SCAN_SECONDS = int(os.getenv("REMINDER_SCAN_SECONDS", "300"))
+    REMINDER_DELIVERY = os.getenv("REMINDER_DELIVERY", "log")
+    REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL")
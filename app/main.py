@@ -1,13 +1,13 @@
 from app import create_app
-from app.migrate import run_migrations
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-run_migrations()   # <--- aplica migraciones automáticas y seed
-
+# Las migraciones y el seed NO corren aquí; se aplican una vez por deploy
+# con `python -m app.migrate` antes de levantar los workers.
 app = create_app()
 
-# 🔥 Arregla el HTTPS detrás de nginx
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# 🔥 Arregla el HTTPS detrás de nginx (y la IP del cliente para los límites
+# por cliente de utils/limits.py)
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
 # 🔥 Fuerza Flask a generar y entender HTTPS
 app.config["PREFERRED_URL_SCHEME"] = "https"
@@ -1,15 +1,25 @@
+import os
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+
 from app import create_app
 from app.models import db
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini")
+
+
 def run_migrations():
     """
     Este script:
-    1. Crea todas las tablas automáticamente.
+    1. Aplica las migraciones de alembic pendientes (migrations/versions).
     2. Inserta el primer tenant si no existe.
     """
     app = create_app()
     with app.app_context():
-        db.create_all()
+        cfg = AlembicConfig(ALEMBIC_INI)
+        cfg.attributes["skip_logging"] = True
+        command.upgrade(cfg, "head")
 
         from app.models import Tenant
 
@@ -23,7 +33,7 @@ def run_migrations():
             db.session.commit()
             print(">>> SEED: Tenant inicial creado")
 
-        print(">>> Migraciones aplicadas automáticamente")
+        print(">>> Migraciones aplicadas")
 
 if __name__ == "__main__":
     run_migrations()
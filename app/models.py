@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from .utils.phones import normalize_phone
+from .utils.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class Tenant(db.Model):
     __tablename__ = "tenants"
@@ -30,6 +32,9 @@ class Tenant(db.Model):
 
 class Service(db.Model):
     __tablename__ = "services"
+    __table_args__ = (
+        db.Index("ix_services_tenant_id", "tenant_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"))
@@ -40,16 +45,47 @@ class Service(db.Model):
 
 class Customer(db.Model):
     __tablename__ = "customers"
+    __table_args__ = (
+        db.Index("uq_customers_tenant_phone", "tenant_id", "phone", unique=True),
+        # búsquedas exactas y por prefijo del teléfono normalizado
+        db.Index(
+            "uq_customers_tenant_phone_norm", "tenant_id", "phone_norm", unique=True,
+            postgresql_ops={"phone_norm": "varchar_pattern_ops"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"))
     phone = db.Column(db.String(20))
+    # solo dígitos, ver utils/phones.normalize_phone
+    phone_norm = db.Column(db.String(20))
     name = db.Column(db.String(100))
     visits = db.Column(db.Integer, default=0)
 
+    # Se mantienen con UPDATEs atómicos en cada escritura de citas
+    # (utils/customer_stats.py); `python -m app.recompute customers` las repara.
+    last_visit_date = db.Column(db.Date)
+    next_appointment_date = db.Column(db.Date)
+    lifetime_spend = db.Column(db.Integer, default=0)
+
+    @db.validates("phone")
+    def _set_phone_norm(self, key, phone):
+        self.phone_norm = normalize_phone(phone)
+        return phone
+
 
 class Appointment(db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # revisión de traslapes al agendar (ver utils/booking.find_conflict)
+        db.Index("ix_appointments_tenant_date_start", "tenant_id", "date", "start_time"),
+        # estadísticas por cliente (utils/customer_stats.py)
+        db.Index("ix_appointments_customer_date", "customer_id", "date"),
+        # escáner de recordatorios de todos los tenants (utils/reminders.py)
+        db.Index("ix_appointments_date_start", "date", "start_time"),
+        # sincronización por cursor (GET /admin/appointments/changes)
+        db.Index("ix_appointments_tenant_change_seq", "tenant_id", "change_seq"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"))
@@ -59,4 +95,105 @@ class Appointment(db.Model):
     start_time = db.Column(db.Time)
     end_time = db.Column(db.Time)
     blocks = db.Column(db.Integer)
+    # precio del servicio al momento de agendar
+    price = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # número de cambio del tenant: se asigna al crear y en cada modificación
+    # (ver utils/changes.py)
+    change_seq = db.Column(db.BigInteger)
+
+
+class ChangeCounter(db.Model):
+    """
+    Último número de cambio de citas por tenant. `purged_seq` es hasta
+    dónde ya se borraron tombstones: un cursor más viejo ya no sirve.
+    """
+    __tablename__ = "change_counters"
+
+    tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"), primary_key=True)
+    seq = db.Column(db.BigInteger, nullable=False, default=0)
+    purged_seq = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class AppointmentTombstone(db.Model):
+    """
+    Cita borrada, para que los clientes que sincronizan por cursor se
+    enteren del borrado.
+    """
+    __tablename__ = "appointment_tombstones"
+    __table_args__ = (
+        db.Index("ix_appointment_tombstones_tenant_change_seq", "tenant_id", "change_seq"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # id de la cita
+    tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"))
+    date = db.Column(db.Date)
+    change_seq = db.Column(db.BigInteger, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CalendarVersion(db.Model):
+    """
+    Contador de cambios por tenant + día. Cada escritura de citas lo sube;
+    las lecturas de calendario arman su ETag con él (ver utils/versions.py).
+    """
+    __tablename__ = "calendar_versions"
+
+    tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+
+class DailyRollup(db.Model):
+    """
+    Totales por tenant + día + servicio para los tableros. Las escrituras
+    de citas los suben/bajan en la misma transacción (utils/rollups.py);
+    `python -m app.recompute rollups` los rearma desde las citas.
+    """
+    __tablename__ = "daily_rollups"
+
+    tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    service_id = db.Column(db.Integer, primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    booked_minutes = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ScheduleException(db.Model):
+    """
+    Día con horario distinto al normal: cerrado (sin horas) o con horario
+    especial (start_time / end_time).
+    """
+    __tablename__ = "schedule_exceptions"
+
+    tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    start_time = db.Column(db.Time)
+    end_time = db.Column(db.Time)
+
+
+class Job(db.Model):
+    """
+    Trabajo en segundo plano. Los workers (app/worker.py) toman los
+    pendientes con SELECT ... FOR UPDATE SKIP LOCKED, ver utils/jobs.py.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    tenant_id = db.Column(db.String(50), db.ForeignKey("tenants.id"))
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # pending -> running -> done | failed (o de vuelta a pending para reintentar)
+    status = db.Column(db.String(10), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    # evita encolar dos veces lo mismo (p. ej. un recordatorio por cita)
+    dedupe_key = db.Column(db.String(200), unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
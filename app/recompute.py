@@ -0,0 +1,38 @@
+import argparse
+
+from app import create_app
+from app.models import db
+
+
+def run(argv=None):
+    """
+    Jobs de reparación: recalculan desde cero lo que se mantiene
+    incrementalmente en cada escritura de citas.
+
+        python -m app.recompute customers [--tenant divasspa]
+        python -m app.recompute rollups [--tenant divasspa]
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.recompute")
+    parser.add_argument("what", choices=["customers", "rollups"])
+    parser.add_argument("--tenant")
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        if args.what == "customers":
+            from app.utils.customer_stats import recompute_customer_stats
+
+            n = recompute_customer_stats(args.tenant)
+            db.session.commit()
+            print(f">>> Estadísticas recalculadas para {n} clientes")
+
+        if args.what == "rollups":
+            from app.utils.rollups import rebuild_rollups
+
+            n = rebuild_rollups(args.tenant)
+            db.session.commit()
+            print(f">>> Rollups diarios rearmados: {n} filas")
+
+
+if __name__ == "__main__":
+    run()
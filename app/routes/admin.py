@@ -1,8 +1,27 @@
 # app/routes/admin.py
-from flask import Blueprint, request, jsonify
-from ..models import db, Tenant, Service, Customer, Appointment
+import csv
+import io
+import json
+
+from flask import Blueprint, Response, request, jsonify, make_response, stream_with_context
+from sqlalchemy import insert, select, tuple_
+from ..models import (
+    db, Tenant, Service, Customer, Appointment, ScheduleException, DailyRollup,
+    ChangeCounter, AppointmentTombstone,
+)
 from datetime import datetime, timedelta
-from ..utils.tenants import get_tenant
+from ..utils.tenants import get_tenant, resolve_tenant_id, invalidate_tenant, tenant_cache
+from ..utils.booking import find_batch_conflicts, find_conflict, lock_day, lock_days
+from ..utils.versions import TENANT_WIDE, _upserts, bump_versions, bump_tenant_version, calendar_etag, not_modified
+from ..utils.schedule import get_schedule, invalidate_schedule
+from ..utils.availability import hhmm, to_minutes
+from ..utils.phones import normalize_phone
+from ..utils.customer_stats import appointment_added, appointment_removed, record_appointments
+from ..utils.rollups import rollup_row, update_rollups
+from ..utils import feed
+from ..utils.changes import track_changes
+from ..utils.replicas import read_replica
+from ..utils.serializers import RowSerializer
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -26,7 +45,10 @@ def bootstrap_create_tenant():
 
     t = Tenant(id=tenant_id, name=name)
     db.session.add(t)
+    # para que los "no existe" cacheados en otros workers dejen de valer
+    bump_tenant_version(t.id)
     db.session.commit()
+    invalidate_tenant(tenant_id=t.id)
 
     return {"ok": True, "tenant": {"id": t.id, "name": t.name}}
 
@@ -37,33 +59,25 @@ def bootstrap_create_tenant():
 @admin_bp.get("/settings")
 def get_settings():
     tenant = get_tenant()
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
 
-    working_days = (
-        list(map(int, tenant.working_days.split(",")))
-        if tenant.working_days else [1,2,3,4,5,6]
-    )
-
+    # horarios ya con defaults, igual que los ve /availability/week
     return jsonify({
         "name": tenant.name,
         "phone": tenant.phone,
-
-        "weekStart": tenant.hours_start_week,
-        "weekEnd": tenant.hours_end_week,
-
-        "satStart": tenant.hours_start_sat,
-        "satEnd": tenant.hours_end_sat,
-
-        "sunStart": tenant.hours_start_sun,
-        "sunEnd": tenant.hours_end_sun,
-
-        "workingDays": working_days,
+        **get_schedule(tenant).settings,
     })
 
 
 
 @admin_bp.put("/settings")
 def update_settings():
-    tenant = get_tenant()
+    # el objeto real de la BD, no la copia del caché
+    tenant = Tenant.query.filter_by(id=resolve_tenant_id()).first()
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
+
     data = request.json or {}
 
     tenant.name = data.get("name", tenant.name)
@@ -80,9 +94,102 @@ def update_settings():
     if "workingDays" in data:
         tenant.working_days = ",".join(str(x) for x in data["workingDays"])
 
+    bump_tenant_version(tenant.id)
     db.session.commit()
+    invalidate_tenant(tenant_id=tenant.id, domain=tenant.domain)
+    invalidate_schedule(tenant.id)
     return jsonify({"message": "Settings updated"})
 
+
+# -------------------------
+#  HORARIO: DÍAS CERRADOS / ESPECIALES
+# -------------------------
+
+def schedule_exception_to_dict(e: ScheduleException):
+    return {
+        "date": e.date.isoformat(),
+        "closed": e.start_time is None,
+        "start": e.start_time.strftime("%H:%M") if e.start_time else None,
+        "end": e.end_time.strftime("%H:%M") if e.end_time else None,
+    }
+
+
+@admin_bp.get("/schedule/exceptions")
+def list_schedule_exceptions():
+    tenant_id = resolve_tenant_id()
+    exceptions = ScheduleException.query.filter_by(
+        tenant_id=tenant_id
+    ).order_by(ScheduleException.date).all()
+    return jsonify([schedule_exception_to_dict(e) for e in exceptions])
+
+
+@admin_bp.put("/schedule/exceptions/<date_str>")
+def put_schedule_exception(date_str):
+    """
+    PUT /admin/schedule/exceptions/2025-12-25?tenant=divasspa
+    {"closed": true}  o  {"start": "10:00", "end": "14:00"}
+    """
+    tenant_id = resolve_tenant_id()
+    if not tenant_id:
+        return jsonify({"error": "Missing tenant"}), 400
+
+    data = request.json or {}
+    try:
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+        if data.get("closed"):
+            start_time = end_time = None
+        else:
+            start_time = datetime.strptime(data["start"], "%H:%M").time()
+            end_time = datetime.strptime(data["end"], "%H:%M").time()
+            if end_time <= start_time:
+                raise ValueError
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Expected YYYY-MM-DD and closed=true or start/end HH:MM"}), 400
+
+    exception = db.session.get(ScheduleException, (tenant_id, date_obj))
+    if not exception:
+        exception = ScheduleException(tenant_id=tenant_id, date=date_obj)
+        db.session.add(exception)
+    exception.start_time = start_time
+    exception.end_time = end_time
+
+    # el día y la versión del tenant (caché de horarios en todos los workers)
+    bump_versions(tenant_id, [date_obj, TENANT_WIDE])
+    db.session.commit()
+    invalidate_schedule(tenant_id)
+
+    return jsonify(schedule_exception_to_dict(exception))
+
+
+@admin_bp.delete("/schedule/exceptions/<date_str>")
+def delete_schedule_exception(date_str):
+    tenant_id = resolve_tenant_id()
+    try:
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "Invalid date format, expected YYYY-MM-DD"}), 400
+
+    exception = db.session.get(ScheduleException, (tenant_id, date_obj))
+    if not exception:
+        return jsonify({"error": "Not found"}), 404
+
+    db.session.delete(exception)
+    # el día y la versión del tenant (caché de horarios en todos los workers)
+    bump_versions(tenant_id, [date_obj, TENANT_WIDE])
+    db.session.commit()
+    invalidate_schedule(tenant_id)
+
+    return jsonify({"ok": True})
+
+
+# -------------------------
+#  CACHE DE TENANTS
+# -------------------------
+
+@admin_bp.get("/cache/tenants")
+def tenant_cache_stats():
+    return jsonify(tenant_cache.stats())
+
 # -------------------------
 #  SERVICES CRUD
 # -------------------------
@@ -97,11 +204,19 @@ def service_to_dict(s: Service):
     }
 
 
+SERVICE_ROWS = RowSerializer(
+    ("id", None), ("tenantId", None), ("name", None), ("durationMinutes", None), ("price", None),
+)
+
+
 @admin_bp.get("/services")
 def list_services():
     tenant_id = request.args.get("tenant")
-    services = Service.query.filter_by(tenant_id=tenant_id).all()
-    return jsonify([service_to_dict(s) for s in services])
+    s = Service.__table__.c
+    rows = db.session.execute(
+        select(s.id, s.tenant_id, s.name, s.duration_minutes, s.price).where(s.tenant_id == tenant_id)
+    )
+    return jsonify(SERVICE_ROWS.many(rows))
 
 
 @admin_bp.post("/services")
@@ -121,6 +236,7 @@ def create_service():
         price=data.get("price", 0),
     )
     db.session.add(service)
+    bump_tenant_version(tenant_id)
     db.session.commit()
 
     return jsonify(service_to_dict(service)), 201
@@ -140,6 +256,7 @@ def update_service(service_id):
     if "price" in data:
         service.price = data["price"]
 
+    bump_tenant_version(service.tenant_id)
     db.session.commit()
 
     return jsonify(service_to_dict(service))
@@ -148,11 +265,133 @@ def update_service(service_id):
 @admin_bp.delete("/services/<int:service_id>")
 def delete_service(service_id):
     service = Service.query.get_or_404(service_id)
+    bump_tenant_version(service.tenant_id)
     db.session.delete(service)
     db.session.commit()
     return jsonify({"message": "Deleted"})
 
 
+# -------------------------
+#  ESTADÍSTICAS (ROLLUPS DIARIOS)
+# -------------------------
+
+MAX_STATS_DAYS = 731
+STATS_GROUPS = ("day", "week", "month")
+
+
+def period_start(d, group):
+    if group == "week":
+        return d - timedelta(days=d.weekday())  # semanas de lunes a domingo
+    if group == "month":
+        return d.replace(day=1)
+    return d
+
+
+def stats_bucket():
+    return {"bookings": 0, "revenue": 0, "bookedMinutes": 0, "openMinutes": 0}
+
+
+def finish_bucket(bucket):
+    open_minutes = bucket["openMinutes"]
+    bucket["utilization"] = (
+        round(bucket["bookedMinutes"] / open_minutes, 4) if open_minutes else None
+    )
+    return bucket
+
+
+@admin_bp.get("/stats")
+@read_replica
+def get_stats():
+    """
+    GET /admin/stats?tenant=divasspa&from=2026-01-01&to=2026-03-31[&group=week]
+
+    Ingresos, minutos agendados contra minutos abiertos y citas por
+    servicio, agrupados por día, semana o mes (from y to incluidos). Solo
+    lee daily_rollups (una fila por día + servicio con citas); los minutos
+    abiertos salen del horario compilado. El costo depende del rango
+    pedido, no de cuántas citas hay en la historia.
+    """
+    tenant = get_tenant()
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
+
+    try:
+        start_date = datetime.strptime(request.args["from"], "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.args["to"], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        return jsonify({"error": "from and to required (YYYY-MM-DD)"}), 400
+
+    if end_date < start_date:
+        return jsonify({"error": "to must be >= from"}), 400
+    if (end_date - start_date).days >= MAX_STATS_DAYS:
+        return jsonify({"error": f"range too large (max {MAX_STATS_DAYS} days)"}), 400
+
+    group = request.args.get("group", "day")
+    if group not in STATS_GROUPS:
+        return jsonify({"error": f"group must be one of {', '.join(STATS_GROUPS)}"}), 400
+
+    schedule = get_schedule(tenant)
+
+    # los rollups cambian en las mismas escrituras que suben calendar_versions
+    etag = calendar_etag(
+        tenant.id, start_date, end_date + timedelta(days=1), schedule.signature(),
+    )
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    periods = {}
+    d = start_date
+    while d <= end_date:
+        bucket = periods.setdefault(period_start(d, group), {**stats_bucket(), "services": {}})
+        hours = schedule.hours_for(d)
+        if hours:
+            bucket["openMinutes"] += hours[1] - hours[0]
+        d += timedelta(days=1)
+
+    rows = db.session.query(
+        DailyRollup.date,
+        DailyRollup.service_id,
+        DailyRollup.bookings,
+        DailyRollup.booked_minutes,
+        DailyRollup.revenue,
+    ).filter(
+        DailyRollup.tenant_id == tenant.id,
+        DailyRollup.date >= start_date,
+        DailyRollup.date <= end_date,
+    )
+
+    for r in rows:
+        if not r.bookings:
+            continue
+        bucket = periods[period_start(r.date, group)]
+        service = bucket["services"].setdefault(
+            r.service_id, {"serviceId": r.service_id, "bookings": 0, "revenue": 0, "bookedMinutes": 0}
+        )
+        for target in (bucket, service):
+            target["bookings"] += r.bookings
+            target["revenue"] += r.revenue
+            target["bookedMinutes"] += r.booked_minutes
+
+    totals = stats_bucket()
+    result = []
+    for start, bucket in sorted(periods.items()):
+        for key in totals:
+            totals[key] += bucket[key]
+        bucket["services"] = sorted(bucket["services"].values(), key=lambda x: x["serviceId"])
+        result.append({"start": start.isoformat(), **finish_bucket(bucket)})
+
+    response = jsonify({
+        "from": start_date.isoformat(),
+        "to": end_date.isoformat(),
+        "group": group,
+        "totals": finish_bucket(totals),
+        "periods": result,
+    })
+    response.set_etag(etag)
+    return response
+
+
 # -------------------------
 #  APPOINTMENTS HELPERS
 # -------------------------
@@ -171,11 +410,142 @@ def appointment_to_dict(a: Appointment):
     }
 
 
+# Los listados leen con select() de Core (tuplas, sin objetos del ORM ni
+# identity map) y arman el JSON con APPOINTMENT_ROWS; appointment_to_dict
+# queda para las respuestas de una sola cita.
+appointments = Appointment.__table__
+
+APPOINTMENT_COLUMNS = (
+    appointments.c.id,
+    appointments.c.tenant_id,
+    appointments.c.customer_id,
+    appointments.c.service_id,
+    appointments.c.date,
+    appointments.c.start_time,
+    appointments.c.end_time,
+    appointments.c.blocks,
+    appointments.c.created_at,
+)
+
+APPOINTMENT_FIELDS = (
+    ("id", None),
+    ("tenantId", None),
+    ("customerId", None),
+    ("serviceId", None),
+    ("date", "date"),
+    ("startTime", "time"),
+    ("endTime", "time"),
+    ("blocks", None),
+    ("createdAt", "datetime"),
+)
+
+APPOINTMENT_ROWS = RowSerializer(*APPOINTMENT_FIELDS)
+APPOINTMENT_CHANGE_ROWS = RowSerializer(*APPOINTMENT_FIELDS, ("seq", None))
+
+EXPORT_FIELDS = list(APPOINTMENT_ROWS.keys)
+
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 500
+
+
+def encode_cursor(a):
+    return f"{a.date.isoformat()}_{a.start_time.strftime('%H:%M:%S')}_{a.id}"
+
+
+def decode_cursor(cursor):
+    date_str, time_str, id_str = cursor.split("_")
+    return (
+        datetime.strptime(date_str, "%Y-%m-%d").date(),
+        datetime.strptime(time_str, "%H:%M:%S").time(),
+        int(id_str),
+    )
+
+
+def appointments_range_response(tenant_id, start_date, end_date):
+    """
+    Respuesta común de day/week/month para citas en [start_date, end_date).
+
+    - Sin parámetros: la lista completa (como siempre).
+    - ?limit=N[&after=cursor]: una página ordenada por (date, start_time, id);
+      el cursor de la siguiente página viene en el header X-Next-Cursor.
+    - ?format=ndjson|csv: exporta todo el rango en streaming, leyendo de a
+      EXPORT_BATCH_SIZE filas con un cursor del lado del servidor.
+
+    Todas llevan ETag; si no hubo cambios en esos días regresa 304.
+    """
+    etag = calendar_etag(tenant_id, start_date, end_date)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    response = make_response(appointments_range_body(tenant_id, start_date, end_date))
+    if response.status_code == 200:
+        response.set_etag(etag)
+    return response
+
+
+def appointments_range_body(tenant_id, start_date, end_date):
+    query = select(*APPOINTMENT_COLUMNS).where(
+        appointments.c.tenant_id == tenant_id,
+        appointments.c.date >= start_date,
+        appointments.c.date < end_date,
+    ).order_by(appointments.c.date, appointments.c.start_time, appointments.c.id)
+
+    fmt = request.args.get("format")
+    if fmt in ("ndjson", "csv"):
+        rows = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        if fmt == "ndjson":
+            def generate():
+                for a in APPOINTMENT_ROWS.iter(rows):
+                    yield json.dumps(a) + "\n"
+
+            return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+        def generate():
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for a in APPOINTMENT_ROWS.iter(rows):
+                writer.writerow(a)
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+            yield buf.getvalue()
+
+        return Response(stream_with_context(generate()), mimetype="text/csv")
+
+    limit = request.args.get("limit", type=int)
+    if limit is None:
+        return jsonify(APPOINTMENT_ROWS.many(db.session.execute(query)))
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    after = request.args.get("after")
+    if after:
+        try:
+            key = decode_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.where(
+            tuple_(appointments.c.date, appointments.c.start_time, appointments.c.id) > key
+        )
+
+    # pedimos una de más para saber si hay siguiente página
+    appts = db.session.execute(query.limit(limit + 1)).all()
+
+    response = jsonify(APPOINTMENT_ROWS.many(appts[:limit]))
+    if len(appts) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(appts[limit - 1])
+    return response
+
+
 # -------------------------
 #  APPOINTMENTS: DAY
 # -------------------------
 
 @admin_bp.get("/appointments/day")
+@read_replica
 def appointments_day():
     tenant_id = request.args.get("tenant")
     date_str = request.args.get("date")  # YYYY-MM-DD
@@ -188,12 +558,7 @@ def appointments_day():
     except ValueError:
         return jsonify({"error": "Invalid date format, expected YYYY-MM-DD"}), 400
 
-    appts = Appointment.query.filter(
-        Appointment.tenant_id == tenant_id,
-        Appointment.date == date_obj,
-    ).all()
-
-    return jsonify([appointment_to_dict(a) for a in appts])
+    return appointments_range_response(tenant_id, date_obj, date_obj + timedelta(days=1))
 
 
 # -------------------------
@@ -201,6 +566,7 @@ def appointments_day():
 # -------------------------
 
 @admin_bp.get("/appointments/week")
+@read_replica
 def appointments_week():
     tenant_id = request.args.get("tenant")
     start_str = request.args.get("start")  # YYYY-MM-DD
@@ -215,13 +581,7 @@ def appointments_week():
 
     end_date = start_date + timedelta(days=7)
 
-    appts = Appointment.query.filter(
-        Appointment.tenant_id == tenant_id,
-        Appointment.date >= start_date,
-        Appointment.date < end_date,
-    ).all()
-
-    return jsonify([appointment_to_dict(a) for a in appts])
+    return appointments_range_response(tenant_id, start_date, end_date)
 
 
 # -------------------------
@@ -229,6 +589,7 @@ def appointments_week():
 # -------------------------
 
 @admin_bp.get("/appointments/month")
+@read_replica
 def appointments_month():
     tenant_id = request.args.get("tenant")
     month_str = request.args.get("month")  # YYYY-MM
@@ -247,13 +608,75 @@ def appointments_month():
     else:
         end_date = datetime(year, month + 1, 1).date()
 
-    appts = Appointment.query.filter(
-        Appointment.tenant_id == tenant_id,
-        Appointment.date >= start_date,
-        Appointment.date < end_date,
+    return appointments_range_response(tenant_id, start_date, end_date)
+
+
+# -------------------------
+#  APPOINTMENTS: CAMBIOS DESDE UN CURSOR
+# -------------------------
+
+DEFAULT_CHANGES_LIMIT = 500
+
+
+@admin_bp.get("/appointments/changes")
+@read_replica
+def appointments_changes():
+    """
+    GET /admin/appointments/changes?tenant=divasspa&since=1234[&limit=500]
+
+    Sincronización incremental: solo las citas creadas o modificadas y las
+    borradas después del número de cambio `since` (0 = todo), en orden.
+    Se guarda `cursor` y se vuelve a pedir con since=cursor; si
+    `hasMore` viene en true hay que seguir pidiendo ya.
+
+    Si el cursor es más viejo que los tombstones que se conservan regresa
+    410 y el cliente tiene que recargar desde since=0.
+    """
+    tenant_id = request.args.get("tenant")
+    if not tenant_id:
+        return jsonify({"error": "Missing tenant"}), 400
+
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", DEFAULT_CHANGES_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    purged_seq = db.session.query(ChangeCounter.purged_seq).filter(
+        ChangeCounter.tenant_id == tenant_id
+    ).scalar() or 0
+    if since and since < purged_seq:
+        return jsonify({"error": "cursor_expired", "message": "Full resync required."}), 410
+
+    # una de más en cada tabla para saber si hay más; las dos usan su
+    # índice (tenant_id, change_seq)
+    changed = db.session.execute(
+        select(*APPOINTMENT_COLUMNS, appointments.c.change_seq).where(
+            appointments.c.tenant_id == tenant_id,
+            appointments.c.change_seq > since,
+        ).order_by(appointments.c.change_seq).limit(limit + 1)
     ).all()
 
-    return jsonify([appointment_to_dict(a) for a in appts])
+    deleted = db.session.query(
+        AppointmentTombstone.id, AppointmentTombstone.date, AppointmentTombstone.change_seq,
+    ).filter(
+        AppointmentTombstone.tenant_id == tenant_id,
+        AppointmentTombstone.change_seq > since,
+    ).order_by(AppointmentTombstone.change_seq).limit(limit + 1).all()
+
+    merged = sorted(
+        [(a.change_seq, "changed", a) for a in changed] + [(t.change_seq, "deleted", t) for t in deleted],
+        key=lambda x: x[0],
+    )
+    page = merged[:limit]
+
+    return jsonify({
+        "changed": APPOINTMENT_CHANGE_ROWS.many(a for _, kind, a in page if kind == "changed"),
+        "deleted": [
+            {"id": t.id, "date": t.date.isoformat(), "seq": seq}
+            for seq, kind, t in page if kind == "deleted"
+        ],
+        "cursor": page[-1][0] if page else since,
+        "hasMore": len(merged) > limit,
+    })
 
 
 # -------------------------
@@ -273,53 +696,626 @@ def create_appointment():
         end_dt = datetime.fromisoformat(data["end"])
     except (KeyError, ValueError):
         return jsonify({"error": "Invalid or missing start/end ISO datetimes"}), 400
+    if end_dt <= start_dt:
+        return jsonify({"error": "end must be after start"}), 400
+
+    service = db.session.get(Service, data["serviceId"])
+    if not service:
+        return jsonify({"error": "Service not found"}), 404
+
+    # misma revisión de traslapes que la reserva pública
+    lock_day(tenant_id, start_dt.date())
+    if find_conflict(tenant_id, start_dt.date(), start_dt.time(), end_dt.time()):
+        return jsonify({
+            "error": "time_conflict",
+            "message": "Time range overlaps with an existing appointment."
+        }), 409
 
     appt = Appointment(
         tenant_id=tenant_id,
-        service_id=data["serviceId"],
+        service_id=service.id,
         customer_id=data["customerId"],
         date=start_dt.date(),
         start_time=start_dt.time(),
         end_time=end_dt.time(),
         blocks=data.get("blocks"),
+        price=service.price,
     )
 
     db.session.add(appt)
+    track_changes(tenant_id, [appt])
+    appointment_added(appt.customer_id, appt.date, appt.price)
+    update_rollups(tenant_id, added=[rollup_row(appt)])
+    bump_versions(tenant_id, [appt.date])
+    db.session.flush()
+    feed.publish(tenant_id, [feed.appointment_event("created", appt)])
     db.session.commit()
 
     return jsonify(appointment_to_dict(appt)), 201
 
+# -------------------------
+#  APPOINTMENTS: IMPORT (BULK)
+# -------------------------
+
+MAX_IMPORT_ROWS = 50000
+IMPORT_CHUNK_SIZE = 500
+
+
+def chunks(items, size=IMPORT_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def read_import_rows():
+    """
+    Filas del import: JSON (lista o {"appointments": [...]}) o CSV con
+    encabezados phone,name,service_id,date,start_time.
+    """
+    if request.mimetype == "text/csv":
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("appointments")
+    return data if isinstance(data, list) else None
+
+
+@admin_bp.post("/appointments/import")
+def import_appointments():
+    """
+    Importa muchas citas en una sola transacción.
+
+    POST /admin/appointments/import?tenant=divasspa
+    [{"phone": "6861234567", "name": "María", "service_id": 1,
+      "date": "2025-11-29", "start_time": "10:00"}, ...]
+
+    Crea los clientes que falten (por teléfono), descarta las filas que se
+    traslapan con citas existentes o con otras del mismo lote y regresa el
+    resultado de cada fila.
+    """
+    tenant_id = request.args.get("tenant")
+    if not tenant_id:
+        return jsonify({"error": "Missing tenant"}), 400
+
+    rows = read_import_rows()
+    if rows is None:
+        return jsonify({"error": "Expected a JSON list or CSV body"}), 400
+    if len(rows) > MAX_IMPORT_ROWS:
+        return jsonify({"error": f"Too many rows (max {MAX_IMPORT_ROWS})"}), 413
+
+    services = {
+        s.id: s for s in
+        db.session.query(Service.id, Service.duration_minutes, Service.price)
+        .filter(Service.tenant_id == tenant_id)
+    }
+
+    results = [{"row": i, "status": "error"} for i in range(len(rows))]
+    valid = []  # (row, phone_norm, name, service, date, start_time, end_time)
+    raw_phones = {}  # phone_norm -> como vino escrito la primera vez
+
+    # 1) validar cada fila
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[i]["error"] = "invalid_row"
+            continue
+
+        raw_phone = str(row.get("phone") or "").strip()
+        phone = normalize_phone(raw_phone)
+        service_id = row.get("service_id", row.get("serviceId"))
+        try:
+            service = services.get(int(service_id))
+        except (TypeError, ValueError):
+            service = None
+
+        if not phone:
+            results[i]["error"] = "phone_required"
+            continue
+        if not service:
+            results[i]["error"] = "service_not_found"
+            continue
+
+        name = row.get("name")
+        if name is not None and not isinstance(name, str):
+            results[i]["error"] = "invalid_name"
+            continue
+
+        try:
+            start_dt = datetime.strptime(f"{row['date']} {row['start_time']}", "%Y-%m-%d %H:%M")
+        except (KeyError, TypeError, ValueError):
+            results[i]["error"] = "invalid_date_or_time"
+            continue
+
+        end_dt = start_dt + timedelta(minutes=service.duration_minutes)
+        raw_phones.setdefault(phone, raw_phone)
+        valid.append((
+            i, phone, (name or "").strip() or None, service,
+            start_dt.date(), start_dt.time(), end_dt.time(),
+        ))
+
+    # 2) clientes: buscar los existentes por teléfono y crear los que falten
+    phones = sorted({v[1] for v in valid})
+    customer_ids = {}
+    for chunk in chunks(phones):
+        customer_ids.update(
+            db.session.query(Customer.phone_norm, Customer.id)
+            .filter(Customer.tenant_id == tenant_id, Customer.phone_norm.in_(chunk))
+        )
+
+    new_customers = {}
+    for i, phone, name, *_ in valid:
+        if phone not in customer_ids and phone not in new_customers and name:
+            new_customers[phone] = name
+
+    if new_customers:
+        # otro request (p. ej. /customers/create) puede crear el mismo
+        # teléfono a la vez: ON CONFLICT DO NOTHING y luego se leen los ids,
+        # sean de este insert o del otro
+        db.session.execute(
+            _upserts[db.engine.dialect.name](Customer).on_conflict_do_nothing(),
+            [
+                {"tenant_id": tenant_id, "phone": raw_phones[phone], "phone_norm": phone,
+                 "name": name, "visits": 0}
+                for phone, name in new_customers.items()
+            ],
+        )
+        for chunk in chunks(sorted(new_customers)):
+            customer_ids.update(
+                db.session.query(Customer.phone_norm, Customer.id)
+                .filter(Customer.tenant_id == tenant_id, Customer.phone_norm.in_(chunk))
+            )
+
+    candidates = []
+    for item in valid:
+        if item[1] in customer_ids:
+            candidates.append(item)
+        else:
+            results[item[0]]["error"] = "name_required"
+
+    # 3) traslapes contra lo existente y dentro del lote
+    if candidates:
+        lock_days(tenant_id, [c[4] for c in candidates])
+        existing = db.session.query(
+            Appointment.date, Appointment.start_time, Appointment.end_time
+        ).filter(
+            Appointment.tenant_id == tenant_id,
+            Appointment.date >= min(c[4] for c in candidates),
+            Appointment.date <= max(c[4] for c in candidates),
+        ).order_by(Appointment.date, Appointment.start_time).all()
+
+        conflicts = find_batch_conflicts(existing, [(c[0], c[4], c[5], c[6]) for c in candidates])
+    else:
+        conflicts = {}
+
+    accepted = []
+    for item in candidates:
+        conflict = conflicts.get(item[0])
+        if conflict is None:
+            accepted.append(item)
+        elif conflict == "time_conflict":
+            results[item[0]]["error"] = "time_conflict"
+        else:
+            results[item[0]]["error"] = "batch_conflict"
+            results[item[0]]["conflictsWith"] = conflict[1]
+
+    # 4) insertar todo junto
+    if accepted:
+        inserted = db.session.execute(
+            insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True),
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "customer_id": customer_ids[phone],
+                    "service_id": service.id,
+                    "date": d,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "blocks": service.duration_minutes // 5,
+                    "price": service.price,
+                }
+                for _, phone, _, service, d, start_time, end_time in accepted
+            ],
+        ).scalars().all()
+        track_changes(tenant_id, inserted)
+
+        events = []
+        for item, appt_id in zip(accepted, inserted):
+            results[item[0]] = {"row": item[0], "status": "created", "id": appt_id}
+            _, _, _, service, d, start_time, end_time = item
+            events.append({
+                "type": "created", "id": appt_id, "date": d.isoformat(),
+                "start": hhmm(to_minutes(start_time)), "end": hhmm(to_minutes(end_time)),
+                "serviceId": service.id,
+            })
+        feed.publish(tenant_id, events)
+
+        bump_versions(tenant_id, [item[4] for item in accepted])
+        update_rollups(tenant_id, added=[
+            (d, service.id, to_minutes(end_time) - to_minutes(start_time), service.price or 0)
+            for _, _, _, service, d, start_time, end_time in accepted
+        ])
+
+        # estadísticas: un UPDATE por cliente con todo lo importado
+        today = datetime.utcnow().date()
+        stats = {}
+        for _, phone, _, service, d, *_ in accepted:
+            s = stats.setdefault(customer_ids[phone], [0, 0, None, None])
+            s[0] += 1
+            s[1] += service.price or 0
+            if d <= today and (s[2] is None or d > s[2]):
+                s[2] = d
+            if d >= today and (s[3] is None or d < s[3]):
+                s[3] = d
+        for customer_id, (count, spend, last_visit, next_appointment) in stats.items():
+            record_appointments(customer_id, count, spend, last_visit, next_appointment, today)
+
+    db.session.commit()
+
+    return jsonify({
+        "created": len(accepted),
+        "failed": len(rows) - len(accepted),
+        "results": results,
+    })
+
+
+# -------------------------
+#  APPOINTMENTS: REAGENDAR / CANCELAR EN LOTE
+# -------------------------
+
+MAX_BATCH_ITEMS = 1000
+
+
+def batch_target(item, appt):
+    """
+    Nueva posición (date, start_time, end_time) de un elemento del lote:
+    "start" (ISO, con "end" opcional; si no, conserva la duración) o
+    "shiftDays" / "shiftMinutes" sobre la posición actual. Regresa None si
+    no es válida (termina antes de empezar o cruza la medianoche).
+    """
+    old_start = datetime.combine(appt.date, appt.start_time)
+    old_end = datetime.combine(appt.date, appt.end_time)
+
+    try:
+        if "start" in item:
+            start_dt = datetime.fromisoformat(item["start"])
+            if "end" in item:
+                end_dt = datetime.fromisoformat(item["end"])
+                if end_dt.date() != start_dt.date():
+                    return None
+                end_dt = datetime.combine(start_dt.date(), end_dt.time())
+            else:
+                end_dt = start_dt + (old_end - old_start)
+        else:
+            shift = timedelta(
+                days=int(item.get("shiftDays") or 0),
+                minutes=int(item.get("shiftMinutes") or 0),
+            )
+            start_dt, end_dt = old_start + shift, old_end + shift
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+    if end_dt <= start_dt or end_dt.date() != start_dt.date():
+        return None
+    return start_dt.date(), start_dt.time(), end_dt.time()
+
+
+@admin_bp.post("/appointments/batch")
+def batch_appointments():
+    """
+    Mueve o cancela muchas citas en una sola transacción (p. ej. pasar
+    todo el martes al miércoles cuando falta alguien del personal).
+
+    POST /admin/appointments/batch?tenant=divasspa
+    {"items": [
+        {"id": 12, "shiftDays": 1},
+        {"id": 13, "start": "2025-11-29T12:00", "end": "2025-11-29T13:00"},
+        {"id": 14, "cancel": true}
+    ], "atomic": false}
+
+    Primero se bloquean los días de origen y destino (lock_days, de una vez
+    y en orden); luego se releen las citas con FOR UPDATE y las nuevas
+    posiciones se revisan contra las que se quedan y entre sí con
+    find_batch_conflicts (un recorrido ordenado por día). Las citas
+    que se mueven o cancelan dejan libre su lugar; si una falla se queda
+    donde estaba y se vuelve a revisar el resto con ella en su lugar.
+
+    Regresa el resultado de cada elemento. Con "atomic": true no se aplica
+    nada si alguno falla (409).
+    """
+    tenant_id = request.args.get("tenant")
+    if not tenant_id:
+        return jsonify({"error": "Missing tenant"}), 400
+
+    data = request.get_json(silent=True)
+    atomic = False
+    if isinstance(data, dict):
+        atomic = bool(data.get("atomic"))
+        data = data.get("items")
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a JSON list or {\"items\": [...]}"}), 400
+    if len(data) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"Too many items (max {MAX_BATCH_ITEMS})"}), 413
+
+    results = [{"row": i, "status": "error"} for i in range(len(data))]
+
+    ids = []
+    for i, item in enumerate(data):
+        appt_id = item.get("id") if isinstance(item, dict) else None
+        if isinstance(appt_id, int) and not isinstance(appt_id, bool):
+            results[i]["id"] = appt_id
+            ids.append(appt_id)
+        else:
+            results[i]["error"] = "invalid_item"
+
+    # 1) días a bloquear: donde está cada cita y a donde va, según una
+    #    primera lectura sin candados
+    unique_ids = sorted(set(ids))
+    current = {}
+    for chunk in chunks(unique_ids):
+        current.update((row.id, row) for row in db.session.execute(
+            select(appointments.c.id, appointments.c.date,
+                   appointments.c.start_time, appointments.c.end_time)
+            .where(appointments.c.tenant_id == tenant_id, appointments.c.id.in_(chunk))
+        ))
+
+    locked = set()
+    for i, item in enumerate(data):
+        row = current.get(item["id"]) if "id" in results[i] else None
+        if row is None:
+            continue
+        locked.add(row.date)
+        target = None if item.get("cancel") else batch_target(item, row)
+        if target is not None:
+            locked.add(target[0])
+    if locked:
+        lock_days(tenant_id, locked)
+
+    # 2) con los días bloqueados, releer las citas (FOR UPDATE) y validar
+    #    cada elemento; nada de lo que se revisa abajo puede cambiar ya
+    appts = {}
+    for chunk in chunks(unique_ids):
+        appts.update(
+            (a.id, a) for a in
+            Appointment.query.filter(Appointment.tenant_id == tenant_id, Appointment.id.in_(chunk))
+            .populate_existing().with_for_update()
+        )
+
+    moves = []    # (row, appt, date, start_time, end_time)
+    cancels = []  # (row, appt)
+    seen = set()
+    for i, item in enumerate(data):
+        if "id" not in results[i]:
+            continue
+        appt = appts.get(item["id"])
+        if appt is None:
+            results[i]["error"] = "not_found"
+            continue
+        if appt.id in seen:
+            results[i]["error"] = "duplicate_id"
+            continue
+        seen.add(appt.id)
+
+        if item.get("cancel"):
+            cancels.append((i, appt))
+            continue
+
+        target = batch_target(item, appt)
+        if target is None:
+            results[i]["error"] = "invalid_date_or_time"
+        elif target == (appt.date, appt.start_time, appt.end_time):
+            results[i] = {"row": i, "id": appt.id, "status": "unchanged"}
+        elif appt.date not in locked or target[0] not in locked:
+            # otra escritura la movió entre la primera lectura y el lock; no
+            # se toman más locks fuera de orden, el cliente puede reintentar
+            results[i]["error"] = "concurrent_change"
+        else:
+            moves.append((i, appt, *target))
+
+    # 3) traslapes: las que se mueven contra las que se quedan y entre sí
+    failed = []
+    if moves:
+        leaving = {a.id for _, a, *_ in moves + cancels}
+        days = sorted({m[2] for m in moves})
+        staying = [
+            (d, start_time, end_time)
+            for appt_id, d, start_time, end_time in db.session.execute(
+                select(appointments.c.id, appointments.c.date,
+                       appointments.c.start_time, appointments.c.end_time)
+                .where(appointments.c.tenant_id == tenant_id, appointments.c.date.in_(days))
+            )
+            if appt_id not in leaving
+        ]
+
+        # una que falla se queda en su lugar y puede chocar con otras que ya
+        # habían pasado: se repite hasta que no haya nuevas fallas
+        pending = {m[0]: m for m in moves}
+        while pending:
+            existing = sorted(staying + [
+                (a.date, a.start_time, a.end_time) for _, a, *_ in failed if a.date in days
+            ], key=lambda r: (r[0], r[1]))
+            conflicts = find_batch_conflicts(existing, [
+                (i, d, start_time, end_time) for i, _, d, start_time, end_time in pending.values()
+            ])
+            if not conflicts:
+                break
+            for i, conflict in conflicts.items():
+                failed.append(pending.pop(i))
+                if conflict == "time_conflict":
+                    results[i]["error"] = "time_conflict"
+                else:
+                    results[i]["error"] = "batch_conflict"
+                    results[i]["conflictsWith"] = data[conflict[1]]["id"]
+        moves = list(pending.values())
+
+    for i, appt, *_ in moves:
+        results[i] = {"row": i, "id": appt.id, "status": "moved"}
+    for i, appt in cancels:
+        results[i] = {"row": i, "id": appt.id, "status": "cancelled"}
+
+    errors = sum(1 for r in results if r["status"] == "error")
+    if atomic and errors:
+        db.session.rollback()
+        for r in results:
+            if r["status"] in ("moved", "cancelled"):
+                r["status"] = "not_applied"
+        return jsonify({"moved": 0, "cancelled": 0, "failed": errors, "results": results}), 409
+
+    # 4) aplicar (los números de cambio se asignan al hacer commit)
+    events = []
+    added, removed = [], []
+    old_dates = {}
+    if moves:
+        for i, appt, d, start_time, end_time in moves:
+            old_dates[appt.id] = appt.date
+            removed.append(rollup_row(appt))
+            appt.date, appt.start_time, appt.end_time = d, start_time, end_time
+            added.append(rollup_row(appt))
+            events.append(feed.appointment_event(
+                "updated", appt, previousDate=old_dates[appt.id].isoformat(),
+            ))
+
+        track_changes(tenant_id, [appt for _, appt, *_ in moves])
+
+    if cancels:
+        track_changes(tenant_id, deleted=[(a.id, a.date) for _, a in cancels])
+        for _, appt in cancels:
+            removed.append(rollup_row(appt))
+            events.append({"type": "deleted", "id": appt.id, "date": appt.date.isoformat()})
+            db.session.delete(appt)
+
+    if moves or cancels:
+        db.session.flush()
+        bump_versions(tenant_id, [
+            *old_dates.values(), *(m[2] for m in moves), *(a.date for _, a in cancels),
+        ])
+        update_rollups(tenant_id, added=added, removed=removed)
+
+        # estadísticas del cliente: igual que al editar o borrar una cita
+        for _, appt, d, *_ in moves:
+            if d != old_dates[appt.id]:
+                appointment_removed(appt.customer_id, old_dates[appt.id], appt.price)
+                appointment_added(appt.customer_id, d, appt.price)
+        for _, appt in cancels:
+            appointment_removed(appt.customer_id, appt.date, appt.price)
+
+        feed.publish(tenant_id, events)
+
+    db.session.commit()
+
+    return jsonify({
+        "moved": len(moves),
+        "cancelled": len(cancels),
+        "failed": errors,
+        "results": results,
+    })
+
+
 @admin_bp.delete("/appointments/<int:appointment_id>")
 def delete_appointment(appointment_id):
     appt = Appointment.query.get_or_404(appointment_id)
+    track_changes(appt.tenant_id, deleted=[(appt.id, appt.date)])
+    bump_versions(appt.tenant_id, [appt.date])
     db.session.delete(appt)
+    db.session.flush()
+    appointment_removed(appt.customer_id, appt.date, appt.price)
+    update_rollups(appt.tenant_id, removed=[rollup_row(appt)])
+    feed.publish(appt.tenant_id, [
+        {"type": "deleted", "id": appt.id, "date": appt.date.isoformat()},
+    ])
     db.session.commit()
     return jsonify({"ok": True})
 
+def update_target(data, appt, service):
+    """
+    Nueva posición (date, start_time, end_time) de una cita según el body
+    del PUT, sin tocarla. Lanza ValueError/TypeError si start/end no son
+    ISO válidos.
+    """
+    new_date, start_time, end_time = appt.date, appt.start_time, appt.end_time
+
+    # Cambiar servicio: recalcular end_time
+    if service is not None:
+        start_dt = datetime.combine(new_date, start_time)
+        end_time = (start_dt + timedelta(minutes=service.duration_minutes)).time()
+
+    # Reagendar
+    if "start" in data:
+        start_dt = datetime.fromisoformat(data["start"])
+        new_date = start_dt.date()
+        start_time = start_dt.time()
+
+    if "end" in data:
+        end_time = datetime.fromisoformat(data["end"]).time()
+
+    return new_date, start_time, end_time
+
+
 @admin_bp.put("/appointments/<int:appointment_id>")
 def update_appointment(appointment_id):
     data = request.json or {}
     appt = Appointment.query.get_or_404(appointment_id)
 
-    # Cambiar servicio
+    service = None
     if "serviceId" in data:
         service = Service.query.get(data["serviceId"])
         if not service:
             return jsonify({"error": "Service not found"}), 404
+
+    # Bloquear el día de origen y el de destino y releer la cita (FOR
+    # UPDATE): todo lo de abajo sale de la fila bloqueada. Si otra escritura
+    # la cambió de día antes del lock, se suelta todo (rollback) y se vuelve
+    # a bloquear junto con el día nuevo, siempre en orden.
+    locked = set()
+    for _ in range(3):
+        try:
+            new_date, start_time, end_time = update_target(data, appt, service)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid start/end ISO datetimes"}), 400
+        if end_time <= start_time:
+            return jsonify({"error": "end must be after start"}), 400
+
+        days = {appt.date, new_date}
+        if days <= locked:
+            break
+        if locked:
+            db.session.rollback()
+        locked |= days
+        lock_days(appt.tenant_id, locked)
+        appt = Appointment.query.filter_by(id=appointment_id).populate_existing().with_for_update().first_or_404()
+    else:
+        return jsonify({
+            "error": "concurrent_change",
+            "message": "The appointment is being changed by another request, try again."
+        }), 409
+
+    old_date = appt.date
+    old_price = appt.price
+    old_rollup = rollup_row(appt)
+
+    if find_conflict(appt.tenant_id, new_date, start_time, end_time, exclude_id=appt.id):
+        return jsonify({
+            "error": "time_conflict",
+            "message": "Time range overlaps with an existing appointment."
+        }), 409
+
+    track_changes(appt.tenant_id, [appt])
+    if service is not None:
         appt.service_id = service.id
-        # recalcular end_time
-        start_dt = datetime.combine(appt.date, appt.start_time)
-        appt.end_time = (start_dt + timedelta(minutes=service.duration_minutes)).time()
+        appt.price = service.price
+    appt.date, appt.start_time, appt.end_time = new_date, start_time, end_time
 
-    # Reagendar
-    if "start" in data:
-        start_dt = datetime.fromisoformat(data["start"])
-        appt.date = start_dt.date()
-        appt.start_time = start_dt.time()
+    bump_versions(appt.tenant_id, [old_date, appt.date])
 
-    if "end" in data:
-        end_dt = datetime.fromisoformat(data["end"])
-        appt.end_time = end_dt.time()
+    # estadísticas del cliente: quitar la cita vieja y sumar la nueva
+    if appt.date != old_date or appt.price != old_price:
+        db.session.flush()
+        appointment_removed(appt.customer_id, old_date, old_price)
+        appointment_added(appt.customer_id, appt.date, appt.price)
+
+    if rollup_row(appt) != old_rollup:
+        update_rollups(appt.tenant_id, added=[rollup_row(appt)], removed=[old_rollup])
 
+    feed.publish(appt.tenant_id, [
+        feed.appointment_event("updated", appt, previousDate=old_date.isoformat()),
+    ])
     db.session.commit()
     return jsonify({"ok": True, "appointment": appointment_to_dict(appt)})
@@ -3,6 +3,17 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 from ..models import db, Appointment, Customer, Service
 from ..utils.tenants import get_tenant
+from ..utils.booking import find_conflict, lock_day
+from ..utils.versions import bump_versions, calendar_etag, not_modified
+from ..utils.schedule import get_schedule
+from ..utils.availability import to_minutes
+from ..utils.phones import normalize_phone
+from ..utils.customer_stats import appointment_added
+from ..utils.rollups import rollup_row, update_rollups
+from ..utils import feed
+from ..utils.changes import track_changes
+from ..utils.replicas import read_replica
+from ..utils.limits import public_endpoint
 
 appointments_bp = Blueprint("appointments", __name__)
 
@@ -15,12 +26,8 @@ def parse_time(time_str: str):
     return datetime.strptime(time_str, "%H:%M").time()
 
 
-def ranges_overlap(start_a, end_a, start_b, end_b):
-    # asume datetime
-    return not (end_a <= start_b or start_a >= end_b)
-
-
 @appointments_bp.post("/")
+@public_endpoint
 def create_appointment():
     """
     Endpoint que usa el ADMIN para registrar una cita.
@@ -45,7 +52,9 @@ def create_appointment():
     date_str = data.get("date")
     start_str = data.get("start_time")
 
-    if not all([phone, service_id, date_str, start_str]):
+    phone_norm = normalize_phone(phone)
+
+    if not all([phone_norm, service_id, date_str, start_str]):
         return jsonify({"error": "phone, service_id, date, start_time are required"}), 400
 
     # buscar servicio
@@ -59,7 +68,7 @@ def create_appointment():
     # buscar o crear cliente
     customer = Customer.query.filter_by(
         tenant_id=tenant.id,
-        phone=phone
+        phone_norm=phone_norm
     ).first()
 
     if not customer:
@@ -89,20 +98,22 @@ def create_appointment():
     start_dt = datetime.combine(date, start_time)
     end_dt = start_dt + timedelta(minutes=service.duration_minutes)
 
-    # revisar traslape de citas para ese tenant + día
-    same_day_appointments = Appointment.query.filter_by(
-        tenant_id=tenant.id,
-        date=date
-    ).all()
-
-    for appt in same_day_appointments:
-        appt_start = datetime.combine(date, appt.start_time)
-        appt_end = datetime.combine(date, appt.end_time)
-        if ranges_overlap(start_dt, end_dt, appt_start, appt_end):
-            return jsonify({
-                "error": "time_conflict",
-                "message": "Time range overlaps with an existing appointment."
-            }), 409
+    # fuera del horario del negocio (incluye días cerrados / especiales)
+    start_min = to_minutes(start_time)
+    if not get_schedule(tenant).allows(date, start_min, start_min + service.duration_minutes):
+        return jsonify({
+            "error": "outside_opening_hours",
+            "message": "The business is closed at that time."
+        }), 409
+
+    # revisar traslape de citas para ese tenant + día (una lectura al índice),
+    # con el día bloqueado hasta el commit para no agendar dos veces
+    lock_day(tenant.id, date)
+    if find_conflict(tenant.id, date, start_dt.time(), end_dt.time()):
+        return jsonify({
+            "error": "time_conflict",
+            "message": "Time range overlaps with an existing appointment."
+        }), 409
 
     # crear la cita
     blocks = service.duration_minutes // 5
@@ -114,13 +125,17 @@ def create_appointment():
         date=date,
         start_time=start_dt.time(),
         end_time=end_dt.time(),
-        blocks=blocks
+        blocks=blocks,
+        price=service.price,
     )
 
-    # incrementar visitas
-    customer.visits = (customer.visits or 0) + 1
-
     db.session.add(new_appt)
+    track_changes(tenant.id, [new_appt])
+    appointment_added(customer.id, date, service.price)
+    update_rollups(tenant.id, added=[rollup_row(new_appt)])
+    bump_versions(tenant.id, [date])
+    db.session.flush()
+    feed.publish(tenant.id, [feed.appointment_event("created", new_appt)])
     db.session.commit()
 
     return jsonify({
@@ -146,6 +161,7 @@ def create_appointment():
 
 
 @appointments_bp.get("/day")
+@read_replica
 def list_day():
     """
     Citas del día para el ADMIN.
@@ -166,30 +182,52 @@ def list_day():
     else:
         date = datetime.utcnow().date()
 
-    appts = Appointment.query.filter_by(
-        tenant_id=tenant.id,
-        date=date
+    # la respuesta lleva nombre, teléfono y visitas de cada cliente
+    etag = calendar_etag(tenant.id, date, date + timedelta(days=1), customers=True)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # una sola consulta con servicio y cliente (outer join por si ya no existen)
+    rows = db.session.query(
+        Appointment.id,
+        Appointment.date,
+        Appointment.start_time,
+        Appointment.end_time,
+        Service.id.label("service_id"),
+        Service.name.label("service_name"),
+        Customer.id.label("customer_id"),
+        Customer.name.label("customer_name"),
+        Customer.phone.label("customer_phone"),
+        Customer.visits.label("customer_visits"),
+    ).outerjoin(
+        Service, Service.id == Appointment.service_id
+    ).outerjoin(
+        Customer, Customer.id == Appointment.customer_id
+    ).filter(
+        Appointment.tenant_id == tenant.id,
+        Appointment.date == date
     ).all()
 
     result = []
-    for a in appts:
-        service = Service.query.get(a.service_id)
-        customer = Customer.query.get(a.customer_id)
+    for a in rows:
         result.append({
             "id": a.id,
             "date": a.date.strftime("%Y-%m-%d"),
             "start_time": a.start_time.strftime("%H:%M"),
             "end_time": a.end_time.strftime("%H:%M"),
             "service": {
-                "id": service.id if service else None,
-                "name": service.name if service else None
+                "id": a.service_id,
+                "name": a.service_name
             },
             "customer": {
-                "id": customer.id if customer else None,
-                "name": customer.name if customer else None,
-                "phone": customer.phone if customer else None,
-                "visits": customer.visits if customer else None
+                "id": a.customer_id,
+                "name": a.customer_name,
+                "phone": a.customer_phone,
+                "visits": a.customer_visits
             }
         })
 
-    return jsonify(result)
+    response = jsonify(result)
+    response.set_etag(etag)
+    return response
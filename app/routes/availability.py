@@ -1,41 +1,38 @@
 from flask import Blueprint, request, jsonify
-from app.models import db, Tenant, Appointment, Service
-from datetime import datetime, timedelta, time
+from app.models import db, Appointment, Service
+from datetime import datetime, timedelta
+from app.utils.tenants import get_tenant_by_domain
+from app.utils.versions import calendar_etag, not_modified
+from app.utils.availability import busy_by_day, build_days
+from app.utils.schedule import get_schedule
+from app.utils.replicas import read_replica
+from app.utils.limits import public_endpoint
 
 availability_bp = Blueprint("availability", __name__)
 
 @availability_bp.route("/availability/week", methods=["GET"])
+@public_endpoint
+@read_replica
 def get_week_availability():
+    """
+    GET /availability/week?tenant=divasspa[&service_id=1][&format=slots]
+
+    Regresa por día los rangos ocupados y libres ("days"). Con service_id
+    cada día trae también las horas de inicio donde cabe ese servicio.
+    Con format=slots regresa el formato viejo ("busySlots" cada 15 min).
+    """
     tenant_name = request.args.get("tenant")
     if not tenant_name:
         return jsonify({"error": "tenant required"}), 400
 
-    tenant = Tenant.query.filter_by(domain=f"{tenant_name}.demoagenda.shop").first()
+    tenant = get_tenant_by_domain(f"{tenant_name}.demoagenda.shop")
     if not tenant:
         return jsonify({"error": "tenant not found"}), 404
 
     # ============================
-    # 🔥 HORARIOS POR DÍA
-    # ============================
-    # ============================
-    # 🔥 HORARIOS POR DÍA
-    # ============================
-    week_start = tenant.hours_start_week or "10:00"
-    week_end   = tenant.hours_end_week or "19:00"
-
-    sat_start = tenant.hours_start_sat or "10:00"
-    sat_end   = tenant.hours_end_sat or "16:00"
-
-    sun_start = tenant.hours_start_sun or "10:00"
-    sun_end   = tenant.hours_end_sun or "16:00"
-
-    # ============================
-    # 🔥 DÍAS LABORALES
+    # 🔥 HORARIOS POR DÍA (compilado y cacheado)
     # ============================
-    if tenant.working_days:
-        working_days = list(map(int, tenant.working_days.split(",")))
-    else:
-        working_days = [1,2,3,4,5,6]  # default
+    schedule = get_schedule(tenant)
 
     # ============================
     # 🔥 Cargar citas próximas 7 días
@@ -43,28 +40,25 @@ def get_week_availability():
     today = datetime.utcnow().date()
     end_date = today + timedelta(days=7)
 
-    appts = Appointment.query.filter(
+    # si nada cambió en esos días, 304 sin tocar la tabla de citas
+    etag = calendar_etag(
+        tenant.id, today, end_date + timedelta(days=1), schedule.signature(),
+    )
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # solo las columnas necesarias, ya ordenadas
+    appts = db.session.query(
+        Appointment.id,
+        Appointment.date,
+        Appointment.start_time,
+        Appointment.end_time,
+    ).filter(
         Appointment.tenant_id == tenant.id,
         Appointment.date >= today,
         Appointment.date <= end_date
-    ).all()
-
-    # ============================
-    # 🔥 GENERAR BUSY SLOTS (cada 15 min)
-    # ============================
-    busy = []
-    for a in appts:
-        start_dt = datetime.combine(a.date, a.start_time)
-        end_dt = datetime.combine(a.date, a.end_time)
-
-        block = start_dt
-        while block < end_dt:
-            busy.append({
-                "id": a.id,   # <-- ADD THIS
-                "start": block.strftime("%Y-%m-%dT%H:%M:%S"),
-                "end": (block + timedelta(minutes=15)).strftime("%Y-%m-%dT%H:%M:%S")
-            })
-            block += timedelta(minutes=15)
+    ).order_by(Appointment.date, Appointment.start_time).all()
 
     # ============================
     # 🔥 Servicios disponibles
@@ -75,22 +69,123 @@ def get_week_availability():
         for s in services
     ]
 
+    response = {
+        **schedule.settings,
+        "services": services_data
+    }
+
     # ============================
-    # 🔥 RESPUESTA COMPLETA
+    # 🔥 FORMATO VIEJO: BUSY SLOTS (cada 15 min)
     # ============================
-    return jsonify({
-        "workingDays": working_days,
+    if request.args.get("format") == "slots":
+        busy = []
+        for a in appts:
+            start_dt = datetime.combine(a.date, a.start_time)
+            end_dt = datetime.combine(a.date, a.end_time)
+
+            block = start_dt
+            while block < end_dt:
+                busy.append({
+                    "id": a.id,
+                    "start": block.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "end": (block + timedelta(minutes=15)).strftime("%Y-%m-%dT%H:%M:%S")
+                })
+                block += timedelta(minutes=15)
+
+        response["busySlots"] = busy
+        response = jsonify(response)
+        response.set_etag(etag)
+        return response
 
-        "weekStart": week_start,
-        "weekEnd": week_end,
+    # ============================
+    # 🔥 RANGOS LIBRES / OCUPADOS POR DÍA
+    # ============================
+    duration = None
+    service_id = request.args.get("service_id", type=int)
+    if service_id is not None:
+        duration = next(
+            (s.duration_minutes for s in services if s.id == service_id), None
+        )
+        if duration is None:
+            return jsonify({"error": "service not found"}), 404
+
+    busy = busy_by_day((a.date, a.start_time, a.end_time) for a in appts)
+    response["days"] = build_days(today, end_date, busy, schedule.hours_for, duration)
+
+    response = jsonify(response)
+    response.set_etag(etag)
+    return response
+
+
+MAX_RANGE_DAYS = 92
+
+
+@availability_bp.route("/availability/range", methods=["GET"])
+@public_endpoint
+@read_replica
+def get_range_availability():
+    """
+    GET /availability/range?tenant=divasspa&start=2025-12-01&end=2026-01-31[&service_id=1]
+
+    Igual que "days" de /availability/week pero para cualquier rango
+    (start y end incluidos, hasta MAX_RANGE_DAYS días). Todas las citas del
+    rango salen en una sola consulta y se unen en intervalos por día, así
+    que 60 días cuestan casi lo mismo que 7.
+    """
+    tenant_name = request.args.get("tenant")
+    if not tenant_name:
+        return jsonify({"error": "tenant required"}), 400
 
-        "satStart": sat_start,
-        "satEnd": sat_end,
+    try:
+        start_date = datetime.strptime(request.args["start"], "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.args["end"], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        return jsonify({"error": "start and end required (YYYY-MM-DD)"}), 400
 
-        "sunStart": sun_start,
-        "sunEnd": sun_end,
+    if end_date < start_date:
+        return jsonify({"error": "end must be >= start"}), 400
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        return jsonify({"error": f"range too large (max {MAX_RANGE_DAYS} days)"}), 400
 
-        "busySlots": busy,
-        "services": services_data
-    })
+    tenant = get_tenant_by_domain(f"{tenant_name}.demoagenda.shop")
+    if not tenant:
+        return jsonify({"error": "tenant not found"}), 404
+
+    schedule = get_schedule(tenant)
+
+    etag = calendar_etag(
+        tenant.id, start_date, end_date + timedelta(days=1), schedule.signature(),
+    )
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    duration = None
+    service_id = request.args.get("service_id", type=int)
+    if service_id is not None:
+        duration = db.session.query(Service.duration_minutes).filter_by(
+            id=service_id, tenant_id=tenant.id
+        ).scalar()
+        if duration is None:
+            return jsonify({"error": "service not found"}), 404
+
+    rows = db.session.query(
+        Appointment.date,
+        Appointment.start_time,
+        Appointment.end_time,
+    ).filter(
+        Appointment.tenant_id == tenant.id,
+        Appointment.date >= start_date,
+        Appointment.date <= end_date
+    ).order_by(Appointment.date, Appointment.start_time)
+
+    busy = busy_by_day(rows)
 
+    response = jsonify({
+        **schedule.settings,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "days": build_days(start_date, end_date, busy, schedule.hours_for, duration),
+    })
+    response.set_etag(etag)
+    return response
@@ -1,18 +1,24 @@
 from flask import Blueprint, jsonify, request
 from ..models import db, Customer
 from ..utils.tenants import get_tenant
+from ..utils.phones import normalize_phone
+from ..utils.customer_stats import visit_dates
+from ..utils.limits import public_endpoint
 
 customers_bp = Blueprint("customers", __name__)
 
+SEARCH_LIMIT = 20
+
 @customers_bp.post("/check")
+@public_endpoint
 def check():
     tenant = get_tenant()
     data = request.json
-    phone = data.get("phone")
+    phone = normalize_phone(data.get("phone"))
 
     customer = Customer.query.filter_by(
-        tenant_id=tenant.id, phone=phone
-    ).first()
+        tenant_id=tenant.id, phone_norm=phone
+    ).first() if phone else None
 
     if customer:
         return jsonify({
@@ -28,15 +34,21 @@ def create():
     data = request.json or {}
     phone = data.get("phone")
     name = data.get("name")
+    phone_norm = normalize_phone(phone)
 
-    if not phone or not name:
+    if not phone_norm or not name:
         return jsonify({"error": "phone and name are required"}), 400
 
+    # (tenant_id, phone_norm) es único
+    if Customer.query.filter_by(tenant_id=tenant.id, phone_norm=phone_norm).first():
+        return jsonify({"error": "Customer already exists"}), 409
+
     customer = Customer(
         tenant_id=tenant.id,
         phone=phone,
         name=name,
-        visits=0
+        visits=0,
+        lifetime_spend=0
     )
     db.session.add(customer)
     db.session.commit()
@@ -47,3 +59,80 @@ def create():
         "phone": customer.phone,
         "visits": customer.visits
     }), 201
+
+@customers_bp.get("/search")
+def search():
+    """
+    Autocompletado para recepción.
+    GET /customers/search?q=686123   (teléfono: por prefijo o subcadena)
+    GET /customers/search?q=mar      (nombre: subcadena, sin mayúsculas)
+
+    Con menos de 3 caracteres solo se busca por prefijo: los índices
+    trigram no sirven para patrones tan cortos. En Postgres los prefijos
+    usan (tenant_id, phone_norm) y (tenant_id, lower(name)) con
+    varchar_pattern_ops, y las subcadenas los índices trigram de
+    phone_norm / lower(name).
+    """
+    tenant = get_tenant()
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
+
+    q = (request.args.get("q") or "").strip()
+    if len(q) < 2:
+        return jsonify([])
+
+    digits = normalize_phone(q)
+    if digits and not any(ch.isalpha() for ch in q):
+        # sin letras → teléfono
+        if len(digits) < 3:
+            condition = Customer.phone_norm.startswith(digits, autoescape=True)
+        else:
+            condition = Customer.phone_norm.contains(digits, autoescape=True)
+        order = Customer.phone_norm
+    else:
+        name = db.func.lower(Customer.name)
+        if len(q) < 3:
+            condition = name.startswith(q.lower(), autoescape=True)
+        else:
+            condition = name.contains(q.lower(), autoescape=True)
+        order = Customer.name
+
+    rows = db.session.query(
+        Customer.id, Customer.name, Customer.phone, Customer.visits
+    ).filter(
+        Customer.tenant_id == tenant.id,
+        condition,
+    ).order_by(order).limit(SEARCH_LIMIT).all()
+
+    return jsonify([
+        {"id": r.id, "name": r.name, "phone": r.phone, "visits": r.visits}
+        for r in rows
+    ])
+
+@customers_bp.get("/<int:customer_id>")
+def profile(customer_id):
+    """
+    Ficha del cliente. Las estadísticas ya vienen en la fila (se mantienen
+    en cada escritura de citas), no se agrega la tabla de citas; solo si
+    la próxima cita guardada ya pasó se vuelven a buscar las fechas
+    (customer_stats.visit_dates).
+    """
+    tenant = get_tenant()
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
+
+    customer = Customer.query.filter_by(tenant_id=tenant.id, id=customer_id).first()
+    if not customer:
+        return jsonify({"error": "Customer not found"}), 404
+
+    last_visit, next_appointment = visit_dates(customer)
+
+    return jsonify({
+        "id": customer.id,
+        "name": customer.name,
+        "phone": customer.phone,
+        "visits": customer.visits or 0,
+        "lifetimeSpend": customer.lifetime_spend or 0,
+        "lastVisitDate": last_visit.isoformat() if last_visit else None,
+        "nextAppointmentDate": next_appointment.isoformat() if next_appointment else None,
+    })
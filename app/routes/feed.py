@@ -0,0 +1,70 @@
+import json
+import queue
+import time
+
+from flask import Blueprint, Response, current_app, jsonify
+
+from ..models import db
+from ..utils import feed
+from ..utils.tenants import get_tenant
+
+feed_bp = Blueprint("feed", __name__)
+
+
+@feed_bp.get("/stream")
+def stream():
+    """
+    GET /feed/stream?tenant=divasspa   (text/event-stream)
+
+    Cambios del calendario del tenant en cuanto se hace commit: eventos
+    created / updated / deleted con la cita (sin datos del cliente),
+    "changed" con solo el día para importaciones grandes, y "reset" cuando
+    el cliente se atrasó o el listener reconectó (hay que recargar).
+    Al conectar llega "ready": a partir de ahí ya no hace falta volver a
+    consultar /availability/week ni /admin/appointments/day.
+    """
+    tenant = get_tenant()
+    if not tenant:
+        return jsonify({"error": "Tenant not found"}), 404
+
+    sub = feed.subscribe(tenant.id)
+    if sub is None:
+        return jsonify({"error": "too_many_streams"}), 503, {"Retry-After": "5"}
+
+    # el lugar se libera siempre: al terminar el stream, cuando el servidor
+    # cierra la respuesta aunque nunca se haya leído (el cliente se fue
+    # antes), o si algo truena antes de regresarla
+    try:
+        response = stream_response(sub)
+        response.call_on_close(lambda: feed.unsubscribe(sub))
+        # el stream no usa la BD: que no se quede con una conexión del pool
+        db.session.remove()
+    except BaseException:
+        feed.unsubscribe(sub)
+        raise
+    return response
+
+
+def stream_response(sub):
+    keepalive = current_app.config["FEED_KEEPALIVE_SECONDS"]
+    max_seconds = current_app.config["FEED_MAX_SECONDS"]
+
+    def generate():
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield "retry: 3000\n\n"
+            yield "event: ready\ndata: {}\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    e = sub.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {e['type']}\ndata: {json.dumps(e)}\n\n"
+        finally:
+            feed.unsubscribe(sub)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # que nginx no junte los eventos
+    })
@@ -0,0 +1,27 @@
+from flask import Blueprint, Response
+from ..utils.metrics import metrics
+from ..utils.tenants import tenant_cache
+from ..utils.limits import limiter
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def export():
+    """
+    Métricas de este worker en formato Prometheus.
+    """
+    stats = tenant_cache.stats()
+    admission = limiter.stats()
+    extra = [
+        ("tenant_cache_hits_total", "counter", "Aciertos del caché de tenants.", stats["hits"]),
+        ("tenant_cache_negative_hits_total", "counter", "Aciertos de 'no existe' en el caché de tenants.", stats["negativeHits"]),
+        ("tenant_cache_misses_total", "counter", "Fallos del caché de tenants.", stats["misses"]),
+        ("tenant_cache_evictions_total", "counter", "Entradas sacadas del caché de tenants.", stats["evictions"]),
+        ("tenant_cache_size", "gauge", "Entradas en el caché de tenants.", stats["size"]),
+        ("public_requests_in_flight", "gauge", "Requests públicos atendiéndose en este worker.", admission["inFlight"]),
+        ("rate_limited_client_total", "counter", "Requests rechazados (429) por el límite por cliente.", admission["rejected"]["client"]),
+        ("rate_limited_tenant_total", "counter", "Requests rechazados (429) por el límite por tenant.", admission["rejected"]["tenant"]),
+        ("public_overloaded_total", "counter", "Requests rechazados (503) por PUBLIC_MAX_CONCURRENT.", admission["rejected"]["overloaded"]),
+    ]
+    return Response(metrics.render(extra), mimetype="text/plain; version=0.0.4")
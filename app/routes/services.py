@@ -1,25 +1,28 @@
 # app/routes/services.py
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
 from ..models import db, Service
 from ..utils.tenants import get_tenant
+from ..utils.versions import bump_tenant_version
+from ..utils.replicas import read_replica
+from ..utils.serializers import RowSerializer
 
 services_bp = Blueprint("services", __name__)
 
+SERVICE_ROWS = RowSerializer(("id", None), ("name", None), ("duration_minutes", None), ("price", None))
+
 @services_bp.get("/")
+@read_replica
 def list_services():
     tenant = get_tenant()
     if not tenant:
         return jsonify({"error": "Tenant not found"}), 404
 
-    services = Service.query.filter_by(tenant_id=tenant.id).all()
-    return jsonify([
-        {
-            "id": s.id,
-            "name": s.name,
-            "duration_minutes": s.duration_minutes,
-            "price": s.price
-        } for s in services
-    ])
+    s = Service.__table__.c
+    rows = db.session.execute(
+        select(s.id, s.name, s.duration_minutes, s.price).where(s.tenant_id == tenant.id)
+    )
+    return jsonify(SERVICE_ROWS.many(rows))
 
 
 @services_bp.post("/")
@@ -43,6 +46,7 @@ def create_service():
         price=price,
     )
     db.session.add(service)
+    bump_tenant_version(tenant.id)
     db.session.commit()
 
     return jsonify({
@@ -75,6 +79,7 @@ def update_service(service_id):
     if "price" in data:
         service.price = data["price"]
 
+    bump_tenant_version(tenant.id)
     db.session.commit()
 
     return jsonify({
@@ -99,6 +104,7 @@ def delete_service(service_id):
     if not service:
         return jsonify({"error": "Service not found"}), 404
 
+    bump_tenant_version(tenant.id)
     db.session.delete(service)
     db.session.commit()
 
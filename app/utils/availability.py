@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+SLOT_MINUTES = 15
+DAY_MINUTES = 24 * 60
+
+
+def to_minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def js_weekday(d):
+    """
+    Día de la semana como lo maneja el front (getDay de JS): 0 = domingo.
+    """
+    return d.isoweekday() % 7
+
+
+def merge_intervals(intervals):
+    """
+    Une intervalos [start, end) en minutos que se tocan o se traslapan.
+    Regresa una lista ordenada sin traslapes.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def free_intervals(busy, open_start, open_end):
+    """
+    Huecos libres dentro del horario [open_start, open_end) dado una lista
+    de intervalos ocupados ya unidos y ordenados.
+    """
+    free = []
+    cursor = open_start
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= open_end:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < open_end:
+        free.append((cursor, open_end))
+    return free
+
+
+def valid_starts(free, duration, step=SLOT_MINUTES):
+    """
+    Horas de inicio (alineadas a `step`) en las que cabe un servicio de
+    `duration` minutos sin salirse de un hueco libre.
+    """
+    starts = []
+    for start, end in free:
+        t = -(-start // step) * step
+        while t + duration <= end:
+            starts.append(t)
+            t += step
+    return starts
+
+
+def busy_by_day(rows):
+    """
+    Agrupa filas (date, start_time, end_time) en intervalos ocupados unidos
+    por día: {date: [(start, end), ...]}.
+    """
+    days = {}
+    for d, start_time, end_time in rows:
+        start = to_minutes(start_time)
+        end = to_minutes(end_time)
+        if end <= start:
+            # la cita cruza la medianoche
+            end = DAY_MINUTES
+        days.setdefault(d, []).append((start, end))
+    return {d: merge_intervals(intervals) for d, intervals in days.items()}
+
+
+def build_days(start_date, end_date, busy, hours_for, duration=None):
+    """
+    Arma la disponibilidad compacta de cada día en [start_date, end_date].
+
+    `hours_for(date)` regresa (open, close) en minutos o None si el negocio
+    no abre ese día. Si viene `duration`, cada día incluye también las
+    horas de inicio válidas para un servicio de esa duración.
+    """
+    result = []
+    d = start_date
+    while d <= end_date:
+        day_busy = busy.get(d, [])
+        hours = hours_for(d)
+
+        entry = {
+            "date": d.isoformat(),
+            "open": None,
+            "close": None,
+            "busy": [[hhmm(s), hhmm(e)] for s, e in day_busy],
+            "free": [],
+        }
+
+        if hours:
+            open_start, open_end = hours
+            free = free_intervals(day_busy, open_start, open_end)
+            entry["open"] = hhmm(open_start)
+            entry["close"] = hhmm(open_end)
+            entry["free"] = [[hhmm(s), hhmm(e)] for s, e in free]
+            if duration:
+                entry["starts"] = [hhmm(t) for t in valid_starts(free, duration)]
+        elif duration:
+            entry["starts"] = []
+
+        result.append(entry)
+        d += timedelta(days=1)
+    return result
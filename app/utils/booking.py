@@ -0,0 +1,106 @@
+from sqlalchemy import text
+
+from ..models import db, Appointment
+from .versions import bump_versions
+
+
+def lock_days(tenant_id, dates):
+    """
+    Toma un lock por tenant + día que dura hasta el commit/rollback, para
+    que dos reservas del mismo día no pasen la revisión de traslapes a la
+    vez. Otros tenants u otros días no se bloquean.
+
+    En Postgres es pg_advisory_xact_lock(hashtext(tenant), día). En otras
+    BDs (SQLite en pruebas/bench) se sube la versión del día, que toma el
+    lock de escritura de la BD.
+    """
+    dates = sorted(set(dates))
+
+    if db.engine.dialect.name != "postgresql":
+        bump_versions(tenant_id, dates)
+        return
+
+    # siempre en el mismo orden para no provocar deadlocks
+    for d in dates:
+        db.session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:tenant_id), :day)"),
+            {"tenant_id": tenant_id, "day": d.toordinal()},
+        )
+
+
+def lock_day(tenant_id, date):
+    lock_days(tenant_id, [date])
+
+
+def find_conflict(tenant_id, date, start_time, end_time, exclude_id=None):
+    """
+    Regresa una cita que se traslapa con [start_time, end_time) en ese
+    tenant + día, o None si el horario está libre. `exclude_id` es la cita
+    que se está moviendo (no choca consigo misma).
+
+    Una sola lectura al índice (tenant_id, date, start_time): la última
+    cita que empieza antes de end_time. Basta con ella porque las citas de
+    un día no se traslapan entre sí: toda escritura (agendar, editar,
+    importar, mover en lote) toma lock_days sobre el día y revisa antes de
+    escribir, así que la que empieza más tarde también es la que termina
+    más tarde. Se leen dos por si la primera es `exclude_id`.
+    """
+    rows = Appointment.query.with_entities(
+        Appointment.id,
+        Appointment.start_time,
+        Appointment.end_time,
+    ).filter(
+        Appointment.tenant_id == tenant_id,
+        Appointment.date == date,
+        Appointment.start_time < end_time,
+    ).order_by(Appointment.start_time.desc()).limit(2).all()
+
+    for row in rows:
+        if row.id != exclude_id:
+            return row if row.end_time > start_time else None
+    return None
+
+
+def find_batch_conflicts(existing, items):
+    """
+    Revisa muchas citas nuevas de una vez contra las existentes y entre sí.
+
+    - existing: filas (date, start_time, end_time) ya agendadas, ordenadas
+      por (date, start_time).
+    - items: tuplas (key, date, start_time, end_time) a validar.
+
+    Un solo recorrido ordenado por día: con un puntero sobre las existentes
+    se sabe el fin más tardío de las que empiezan antes y la siguiente que
+    empieza después. Regresa {key: motivo} para las que chocan, donde motivo
+    es "time_conflict" (contra una existente) o ("batch_conflict", otra_key)
+    (contra otra del mismo lote, gana la que empieza antes).
+    """
+    by_day = {}
+    for d, start_time, end_time in existing:
+        by_day.setdefault(d, []).append((start_time, end_time))
+
+    conflicts = {}
+    current_day = None
+    for key, d, start_time, end_time in sorted(items, key=lambda it: (it[1], it[2])):
+        if d != current_day:
+            current_day = d
+            day_existing = by_day.get(d, [])
+            j = 0
+            busy_end = None
+            last_key, last_end = None, None
+
+        while j < len(day_existing) and day_existing[j][0] <= start_time:
+            if busy_end is None or day_existing[j][1] > busy_end:
+                busy_end = day_existing[j][1]
+            j += 1
+
+        if (busy_end is not None and start_time < busy_end) or (
+            j < len(day_existing) and day_existing[j][0] < end_time
+        ):
+            conflicts[key] = "time_conflict"
+        elif last_end is not None and start_time < last_end:
+            conflicts[key] = ("batch_conflict", last_key)
+        else:
+            last_key, last_end = key, end_time
+
+    return conflicts
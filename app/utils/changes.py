@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, event, func, select, update
+
+from ..models import db, Appointment, AppointmentTombstone, ChangeCounter
+from .replicas import RoutingSession
+from .versions import _upserts
+
+counters = ChangeCounter.__table__
+tombstones = AppointmentTombstone.__table__
+appointments = Appointment.__table__
+
+
+# -------------------------
+#  NÚMEROS DE CAMBIO
+# -------------------------
+#
+# Garantía de orden: dentro de un tenant, un cambio con número N se ve
+# (hace commit) después de todos los que tienen número menor. Por eso un
+# cliente que guarda cursor=N nunca se salta un cambio.
+#
+# Los números NO se toman a media transacción: las escrituras solo anotan
+# qué citas cambiaron (track_changes) y los números se asignan justo antes
+# del commit, como último paso (assign_change_seqs). El UPDATE del contador
+# del tenant deja su fila bloqueada hasta el commit, así que dos
+# escrituras se forman solo durante su commit y no mientras revisan
+# traslapes; los candados por día (booking.lock_days) siguen dejando
+# trabajar en paralelo a días distintos. Como nadie espera otro candado
+# teniendo el del contador, no hay deadlocks.
+
+def track_changes(tenant_id, changed=(), deleted=()):
+    """
+    Anota en la transacción actual las citas creadas o modificadas
+    (objetos Appointment o ids) y las borradas (pares id, date). Al hacer
+    commit reciben su número de cambio y las borradas su tombstone.
+    """
+    if not tenant_id:
+        return
+    pending = db.session.info.setdefault("changes_pending", {})
+    tenant_changed, tenant_deleted = pending.setdefault(tenant_id, ([], []))
+    tenant_changed.extend(changed)
+    tenant_deleted.extend(deleted)
+
+
+def reserve_change_seqs(session, tenant_id, n):
+    """
+    Reserva `n` números seguidos para el tenant y regresa el primero. Deja
+    la fila del contador bloqueada hasta el commit.
+    """
+    stmt = _upserts[db.engine.dialect.name](counters).values(
+        tenant_id=tenant_id, seq=n, purged_seq=0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id"],
+        set_={"seq": counters.c.seq + n},
+    ).returning(counters.c.seq)
+    last = session.execute(stmt).scalar_one()
+    return last - n + 1
+
+
+@event.listens_for(RoutingSession, "before_commit")
+def assign_change_seqs(session):
+    """
+    Último paso antes del commit: numera lo anotado con track_changes (un
+    contador por tenant, en orden de tenant) y guarda los tombstones.
+    Deja en session.info["change_seqs"] el número de cada cita para los
+    eventos del feed.
+    """
+    pending = session.info.pop("changes_pending", None)
+    if not pending:
+        return
+    session.flush()
+
+    seqs = session.info.setdefault("change_seqs", {})
+    now = datetime.utcnow()
+    for tenant_id in sorted(pending):
+        changed, deleted = pending[tenant_id]
+        deleted_ids = {appt_id for appt_id, _ in deleted}
+
+        # una sola vez por cita, y nada para las que se borraron después
+        objects = {}
+        for item in changed:
+            appt_id = item if isinstance(item, int) else item.id
+            if appt_id not in deleted_ids:
+                objects.pop(appt_id, None)
+                objects[appt_id] = item
+        deleted = list(dict(deleted).items())
+
+        n = len(objects) + len(deleted)
+        if not n:
+            continue
+        seq = reserve_change_seqs(session, tenant_id, n)
+
+        by_id = []
+        for appt_id, item in objects.items():
+            seqs[("changed", tenant_id, appt_id)] = seq
+            if isinstance(item, int):
+                by_id.append({"appt_id": appt_id, "seq": seq})
+            else:
+                item.change_seq = seq
+            seq += 1
+        if by_id:
+            session.execute(
+                update(appointments)
+                .where(appointments.c.id == bindparam("appt_id"))
+                .values(change_seq=bindparam("seq")),
+                by_id,
+            )
+
+        if deleted:
+            rows = []
+            for appt_id, d in deleted:
+                seqs[("deleted", tenant_id, appt_id)] = seq
+                rows.append({
+                    "id": appt_id, "tenant_id": tenant_id, "date": d,
+                    "change_seq": seq, "deleted_at": now,
+                })
+                seq += 1
+            session.execute(tombstones.insert(), rows)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+@event.listens_for(RoutingSession, "after_rollback")
+def _clear_change_seqs(session):
+    session.info.pop("changes_pending", None)
+    session.info.pop("change_seqs", None)
+
+
+def purge_tombstones(days=90):
+    """
+    Borra tombstones de más de `days` días y sube purged_seq de cada
+    tenant: los clientes con un cursor anterior reciben 410 y recargan.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    purged = db.session.execute(
+        select(tombstones.c.tenant_id, func.max(tombstones.c.change_seq))
+        .where(tombstones.c.deleted_at < cutoff)
+        .group_by(tombstones.c.tenant_id)
+    ).all()
+
+    for tenant_id, seq in purged:
+        db.session.execute(
+            update(counters)
+            .where(counters.c.tenant_id == tenant_id, counters.c.purged_seq < seq)
+            .values(purged_seq=seq)
+        )
+    n = db.session.execute(delete(tombstones).where(tombstones.c.deleted_at < cutoff)).rowcount
+    db.session.commit()
+    return n
@@ -0,0 +1,175 @@
+from datetime import datetime
+
+from sqlalchemy import case, event, func, select
+
+from ..models import db, Appointment, Customer
+from .replicas import RoutingSession
+from .versions import CUSTOMERS, bump_versions
+
+customers = Customer.__table__
+appointments = Appointment.__table__
+
+
+def _today():
+    return datetime.utcnow().date()
+
+
+# -------------------------
+#  VERSIÓN DE CLIENTES
+# -------------------------
+#
+# Las listas de citas con datos del cliente (GET /appointments/day) arman
+# su ETag también con la fila CUSTOMERS del tenant. Cada cambio de
+# estadísticas la sube antes del commit; va antes que assign_change_seqs
+# (insert=True) para que nadie espere esta fila teniendo la del contador.
+
+def touch_customers(customer_ids=(), tenant_ids=()):
+    touched = db.session.info.setdefault("customers_touched", (set(), set()))
+    touched[0].update(customer_ids)
+    touched[1].update(tenant_ids)
+
+
+@event.listens_for(RoutingSession, "before_commit", insert=True)
+def bump_customer_versions(session):
+    touched = session.info.pop("customers_touched", None)
+    if not touched:
+        return
+    customer_ids, tenant_ids = touched
+    if customer_ids:
+        tenant_ids |= set(session.execute(
+            select(customers.c.tenant_id).where(customers.c.id.in_(customer_ids)).distinct()
+        ).scalars())
+    for tenant_id in sorted(t for t in tenant_ids if t):
+        bump_versions(tenant_id, [CUSTOMERS])
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _clear_customers_touched(session):
+    session.info.pop("customers_touched", None)
+
+
+def record_appointments(customer_id, count, spend, last_visit=None, next_appointment=None, today=None):
+    """
+    Suma `count` citas y `spend` al cliente en un solo UPDATE atómico (sin
+    leer-modificar-escribir en Python). `last_visit` / `next_appointment`
+    son candidatos: solo reemplazan si son más recientes / más próximos.
+    """
+    today = today or _today()
+    values = {
+        "visits": func.coalesce(customers.c.visits, 0) + count,
+        "lifetime_spend": func.coalesce(customers.c.lifetime_spend, 0) + spend,
+    }
+    if last_visit is not None:
+        values["last_visit_date"] = case(
+            (customers.c.last_visit_date.is_(None), last_visit),
+            (customers.c.last_visit_date < last_visit, last_visit),
+            else_=customers.c.last_visit_date,
+        )
+    if next_appointment is not None:
+        # una próxima cita que ya pasó se considera vencida
+        values["next_appointment_date"] = case(
+            (customers.c.next_appointment_date.is_(None), next_appointment),
+            (customers.c.next_appointment_date < today, next_appointment),
+            (customers.c.next_appointment_date > next_appointment, next_appointment),
+            else_=customers.c.next_appointment_date,
+        )
+    db.session.execute(
+        customers.update().where(customers.c.id == customer_id).values(**values)
+    )
+    touch_customers([customer_id])
+
+
+def appointment_added(customer_id, date, price, today=None):
+    today = today or _today()
+    record_appointments(
+        customer_id, 1, price or 0,
+        last_visit=date if date <= today else None,
+        next_appointment=date if date >= today else None,
+        today=today,
+    )
+
+
+def appointment_removed(customer_id, date, price, today=None):
+    """
+    Resta una cita ya borrada/movida (hay que hacer flush antes). Solo si
+    era la última visita o la próxima cita se vuelve a buscar esa fecha,
+    con el índice (customer_id, date).
+    """
+    today = today or _today()
+    last_visit = select(func.max(appointments.c.date)).where(
+        appointments.c.customer_id == customer_id,
+        appointments.c.date <= today,
+    ).scalar_subquery()
+    next_appointment = select(func.min(appointments.c.date)).where(
+        appointments.c.customer_id == customer_id,
+        appointments.c.date >= today,
+    ).scalar_subquery()
+
+    db.session.execute(
+        customers.update().where(customers.c.id == customer_id).values(
+            visits=func.coalesce(customers.c.visits, 0) - 1,
+            lifetime_spend=func.coalesce(customers.c.lifetime_spend, 0) - (price or 0),
+            last_visit_date=case(
+                (customers.c.last_visit_date == date, last_visit),
+                else_=customers.c.last_visit_date,
+            ),
+            next_appointment_date=case(
+                (customers.c.next_appointment_date == date, next_appointment),
+                else_=customers.c.next_appointment_date,
+            ),
+        )
+    )
+    touch_customers([customer_id])
+
+
+def visit_dates(customer, today=None):
+    """
+    (última visita, próxima cita) del cliente al día de hoy. Las columnas
+    solo son exactas el día en que se escribieron: si la "próxima cita" ya
+    pasó, ahora es una visita y se vuelven a buscar las dos fechas con el
+    índice (customer_id, date). Si no, se usan tal cual, sin consultas.
+    """
+    today = today or _today()
+    last_visit, next_appointment = customer.last_visit_date, customer.next_appointment_date
+    if next_appointment is None or next_appointment >= today:
+        return last_visit, next_appointment
+
+    def probe(agg, *where):
+        return select(agg).where(appointments.c.customer_id == customer.id, *where).scalar_subquery()
+
+    row = db.session.execute(select(
+        probe(func.max(appointments.c.date), appointments.c.date <= today),
+        probe(func.min(appointments.c.date), appointments.c.date >= today),
+    )).one()
+    return row[0], row[1]
+
+
+def recompute_customer_stats(tenant_id=None, today=None):
+    """
+    Recalcula las estadísticas de todos los clientes (o de un tenant)
+    desde la tabla de citas, en un solo UPDATE. Es el job de reparación;
+    conviene correrlo a diario porque la "próxima cita" de ayer hoy ya es
+    "última visita".
+    """
+    today = today or _today()
+
+    def agg(expr, *where):
+        return select(expr).where(
+            appointments.c.customer_id == customers.c.id, *where
+        ).scalar_subquery()
+
+    stmt = customers.update().values(
+        visits=agg(func.count()),
+        lifetime_spend=agg(func.coalesce(func.sum(appointments.c.price), 0)),
+        last_visit_date=agg(func.max(appointments.c.date), appointments.c.date <= today),
+        next_appointment_date=agg(func.min(appointments.c.date), appointments.c.date >= today),
+    )
+    if tenant_id:
+        stmt = stmt.where(customers.c.tenant_id == tenant_id)
+        touch_customers(tenant_ids=[tenant_id])
+    else:
+        touch_customers(tenant_ids=db.session.execute(
+            select(customers.c.tenant_id).distinct()
+        ).scalars())
+
+    return db.session.execute(stmt).rowcount
@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+
+from ..models import db
+from .availability import hhmm, to_minutes
+from .changes import assign_change_seqs  # noqa: F401  (su before_commit corre antes que el de aquí)
+from .replicas import RoutingSession
+
+log = logging.getLogger(__name__)
+
+# Canal de LISTEN/NOTIFY en Postgres
+CHANNEL = "calendar_changes"
+
+# NOTIFY acepta hasta 8000 bytes por mensaje
+MAX_PAYLOAD_BYTES = 7000
+
+# Más eventos que esto en una escritura (importaciones) se resumen en un
+# "changed" por día
+MAX_EVENTS = 200
+
+
+# -------------------------
+#  EVENTOS
+# -------------------------
+
+def appointment_event(kind, appt, **extra):
+    """
+    Delta pequeño para el calendario: sin datos del cliente, porque la
+    página pública de reservas también lo recibe. "seq" se llena al hacer
+    commit (ver changes.assign_change_seqs).
+    """
+    return {
+        "type": kind,
+        "id": appt.id,
+        "date": appt.date.isoformat(),
+        "start": hhmm(to_minutes(appt.start_time)),
+        "end": hhmm(to_minutes(appt.end_time)),
+        "serviceId": appt.service_id,
+        **extra,
+    }
+
+
+def compact(events):
+    if len(events) <= MAX_EVENTS:
+        return events
+    dates = sorted({e["date"] for e in events})
+    return [{"type": "changed", "date": d} for d in dates]
+
+
+def payloads(tenant_id, events):
+    """
+    Parte los eventos en mensajes que caben en un NOTIFY.
+    """
+    batch = []
+    for e in events:
+        candidate = batch + [e]
+        if batch and len(json.dumps({"t": tenant_id, "e": candidate})) > MAX_PAYLOAD_BYTES:
+            yield json.dumps({"t": tenant_id, "e": batch})
+            candidate = [e]
+        batch = candidate
+    if batch:
+        yield json.dumps({"t": tenant_id, "e": batch})
+
+
+def publish(tenant_id, events):
+    """
+    Publica cambios del calendario de un tenant con la transacción actual:
+    solo salen si se hace commit.
+
+    Se juntan hasta el commit para ponerles su número de cambio. En
+    Postgres salen con pg_notify dentro del commit (los reciben los
+    listeners de todos los workers); en otras bases se entregan en este
+    proceso después del commit.
+    """
+    events = [e for e in events if e]
+    if not tenant_id or not events:
+        return
+    db.session.info.setdefault("feed_pending", []).append((tenant_id, events))
+
+
+@event.listens_for(RoutingSession, "before_commit")
+def _stamp_and_notify(session):
+    pending = session.info.get("feed_pending")
+    if not pending:
+        return
+
+    seqs = session.info.get("change_seqs", {})
+    for tenant_id, events in pending:
+        for e in events:
+            kind = "deleted" if e.get("type") == "deleted" else "changed"
+            seq = seqs.get((kind, tenant_id, e.get("id")))
+            if seq is not None:
+                e["seq"] = seq
+
+    if db.engine.dialect.name != "postgresql":
+        return
+    for tenant_id, events in session.info.pop("feed_pending"):
+        for payload in payloads(tenant_id, compact(events)):
+            session.execute(
+                sql_select(func.pg_notify(CHANNEL, payload)),
+                bind_arguments={"bind": db.engine},  # nunca a una réplica
+            )
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _deliver_local(session):
+    for tenant_id, events in session.info.pop("feed_pending", ()):
+        hub.dispatch(tenant_id, compact(events))
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _drop_local(session):
+    session.info.pop("feed_pending", None)
+
+
+# -------------------------
+#  SUSCRIPTORES (POR PROCESO)
+# -------------------------
+
+class Subscription:
+    """
+    Cola de eventos de un cliente SSE. Si el cliente no alcanza a leer y la
+    cola se llena, se vacía y se manda un "reset" para que recargue.
+    """
+
+    def __init__(self, tenant_id, maxsize=100):
+        self.tenant_id = tenant_id
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.read_at = time.monotonic()
+
+    def push(self, events):
+        try:
+            for e in events:
+                self.queue.put_nowait(e)
+        except queue.Full:
+            self.reset()
+
+    def reset(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self.queue.put_nowait({"type": "reset"})
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        self.read_at = time.monotonic()
+        return self.queue.get(timeout=timeout)
+
+
+class Hub:
+    """
+    Reparte los cambios de cada tenant a los clientes SSE conectados a este
+    worker. Un solo listener de Postgres por proceso lo alimenta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs = {}  # tenant_id -> set(Subscription)
+        self._count = 0
+
+    def subscribe(self, tenant_id, limit, stale_after=None):
+        """
+        Con el tope lleno, antes de rechazar saca las suscripciones que
+        nadie lee hace más de `stale_after` segundos (un stream vivo lee al
+        menos cada FEED_KEEPALIVE_SECONDS): respuestas que el servidor
+        nunca llegó a cerrar.
+        """
+        tenant_id = tenant_id.lower()
+        with self._lock:
+            if self._count >= limit and stale_after is not None:
+                self._reap(time.monotonic() - stale_after)
+            if self._count >= limit:
+                return None
+            sub = Subscription(tenant_id)
+            self._subs.setdefault(tenant_id, set()).add(sub)
+            self._count += 1
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._remove(sub)
+
+    def _remove(self, sub):
+        subs = self._subs.get(sub.tenant_id)
+        if subs and sub in subs:
+            subs.discard(sub)
+            self._count -= 1
+            if not subs:
+                del self._subs[sub.tenant_id]
+
+    def _reap(self, cutoff):
+        stale = [s for group in self._subs.values() for s in group if s.read_at < cutoff]
+        for sub in stale:
+            self._remove(sub)
+        if stale:
+            log.warning("feed: dropped %d abandoned subscriptions", len(stale))
+
+    def dispatch(self, tenant_id, events):
+        tenant_id = tenant_id.lower()
+        with self._lock:
+            subs = list(self._subs.get(tenant_id, ()))
+        for sub in subs:
+            sub.push(events)
+
+    def reset_all(self):
+        with self._lock:
+            subs = [s for group in self._subs.values() for s in group]
+        for sub in subs:
+            sub.reset()
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": self._count, "tenants": len(self._subs)}
+
+
+hub = Hub()
+
+
+# -------------------------
+#  LISTENER DE POSTGRES
+# -------------------------
+
+class PgListener(threading.Thread):
+    """
+    Hilo con su propia conexión (fuera del pool, contada aparte en
+    DB_LISTENER_CONNECTIONS) haciendo LISTEN. Si se cae, reconecta y manda
+    "reset" a todos porque pudo perder avisos.
+    """
+
+    def __init__(self, engine, hub):
+        super().__init__(name="feed-listener", daemon=True)
+        self.engine = engine
+        self.hub = hub
+        self.pid = os.getpid()
+
+    def run(self):
+        delay = 1
+        while True:
+            conn = None
+            try:
+                raw = self.engine.raw_connection()
+                raw.detach()
+                conn = raw.dbapi_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                delay = 1
+                self.listen(conn)
+            except Exception:
+                log.exception("feed listener lost its connection")
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self.hub.reset_all()
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def listen(self, conn):
+        while True:
+            if select.select([conn], [], [], 30) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                note = conn.notifies.pop(0)
+                try:
+                    data = json.loads(note.payload)
+                except ValueError:
+                    continue
+                self.hub.dispatch(data["t"], data["e"])
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def subscribe(tenant_id):
+    """
+    Suscribe un cliente al feed del tenant, o None si este worker ya tiene
+    FEED_MAX_STREAMS clientes (el tope es por worker, ver config). Arranca el listener la primera vez (en
+    cada worker, después del fork).
+    """
+    global _listener
+
+    if db.engine.dialect.name == "postgresql":
+        with _listener_lock:
+            if _listener is None or _listener.pid != os.getpid() or not _listener.is_alive():
+                _listener = PgListener(db.engine, hub)
+                _listener.start()
+
+    cfg = current_app.config
+    return hub.subscribe(
+        tenant_id, cfg["FEED_MAX_STREAMS"], stale_after=2 * cfg["FEED_KEEPALIVE_SECONDS"] + 5,
+    )
+
+
+def unsubscribe(sub):
+    hub.unsubscribe(sub)
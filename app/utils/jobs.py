@@ -0,0 +1,182 @@
+import random
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+
+from ..models import db, Job
+from .versions import _upserts
+
+jobs = Job.__table__
+
+# kind -> función(payload); se registran con @job("kind")
+HANDLERS = {}
+
+MAX_BACKOFF_SECONDS = 3600
+
+
+def job(kind):
+    """
+    Registra la función que procesa los trabajos de tipo `kind`. Recibe el
+    payload (dict) y corre dentro de su propia transacción: si truena se
+    hace rollback y el trabajo se reintenta más tarde.
+    """
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue_many(kind, items):
+    """
+    Encola varios trabajos en la transacción actual (se ven hasta el
+    commit del que llama). Cada item es un dict con payload y,
+    opcionalmente, tenant_id, run_at y dedupe_key; los que repiten un
+    dedupe_key que ya existe se ignoran.
+    """
+    if not items:
+        return
+
+    now = datetime.utcnow()
+    stmt = _upserts[db.engine.dialect.name](jobs).on_conflict_do_nothing(
+        index_elements=["dedupe_key"],
+    )
+    db.session.execute(stmt, [
+        {
+            "kind": kind,
+            "tenant_id": item.get("tenant_id"),
+            "payload": item.get("payload") or {},
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": item.get("max_attempts") or current_app.config["JOB_MAX_ATTEMPTS"],
+            "run_at": item.get("run_at") or now,
+            "dedupe_key": item.get("dedupe_key"),
+            "created_at": now,
+        }
+        for item in items
+    ])
+
+
+def enqueue(kind, payload=None, **options):
+    enqueue_many(kind, [{"payload": payload, **options}])
+
+
+def backoff(attempts):
+    """
+    Espera antes del siguiente intento: exponencial con algo de azar para
+    que los reintentos no lleguen todos juntos.
+    """
+    base = current_app.config["JOB_BACKOFF_SECONDS"]
+    seconds = min(base * 2 ** max(0, attempts - 1), MAX_BACKOFF_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def claim(limit=10):
+    """
+    Toma hasta `limit` trabajos listos y los marca como running en una
+    transacción corta. FOR UPDATE SKIP LOCKED hace que varios workers no
+    se peleen por las mismas filas: cada uno se salta las que otro ya
+    está tomando. También recupera los running de un worker que murió
+    (locked_at más viejo que JOB_LOCK_TIMEOUT_SECONDS), salvo que ya hayan
+    gastado sus intentos: esos se marcan failed para que un trabajo que
+    tumba al worker no se repita para siempre.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config["JOB_LOCK_TIMEOUT_SECONDS"])
+    abandoned = and_(jobs.c.status == "running", jobs.c.locked_at < stale)
+
+    dead = db.session.execute(
+        update(jobs).where(abandoned, jobs.c.attempts >= jobs.c.max_attempts).values(
+            status="failed",
+            locked_at=None,
+            last_error="worker lost the job (lock timeout) on its last attempt",
+        )
+    ).rowcount
+    if dead:
+        db.session.commit()
+        current_app.logger.warning("%d abandoned jobs marked failed", dead)
+
+    ids = db.session.execute(
+        select(jobs.c.id).where(or_(
+            and_(jobs.c.status == "pending", jobs.c.run_at <= now),
+            and_(abandoned, jobs.c.attempts < jobs.c.max_attempts),
+        )).order_by(jobs.c.run_at).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    if not ids:
+        db.session.rollback()
+        return []
+
+    claimed = db.session.execute(
+        update(jobs).where(jobs.c.id.in_(ids)).values(
+            status="running",
+            locked_at=now,
+            attempts=jobs.c.attempts + 1,
+        ).returning(
+            jobs.c.id, jobs.c.kind, jobs.c.payload, jobs.c.attempts, jobs.c.max_attempts,
+        )
+    ).all()
+    db.session.commit()
+    return claimed
+
+
+def run_job(claimed):
+    """
+    Corre un trabajo ya tomado con claim(). Regresa True si terminó bien.
+    """
+    handler = HANDLERS.get(claimed.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"no handler for job kind {claimed.kind!r}")
+        handler(claimed.payload or {})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)[-2000:]
+        if claimed.attempts >= claimed.max_attempts:
+            values = {"status": "failed", "locked_at": None, "last_error": error}
+        else:
+            values = {
+                "status": "pending",
+                "locked_at": None,
+                "last_error": error,
+                "run_at": datetime.utcnow() + backoff(claimed.attempts),
+            }
+        db.session.execute(update(jobs).where(jobs.c.id == claimed.id).values(**values))
+        db.session.commit()
+        current_app.logger.warning(
+            "job %s (%s) failed: %s", claimed.id, claimed.kind, error.strip().splitlines()[-1],
+        )
+        return False
+
+    db.session.execute(
+        update(jobs).where(jobs.c.id == claimed.id).values(
+            status="done", locked_at=None, last_error=None,
+        )
+    )
+    db.session.commit()
+    return True
+
+
+def run_pending(limit=10):
+    """
+    Toma y corre un lote de trabajos. Regresa cuántos tomó (0 = no había).
+    """
+    claimed = claim(limit)
+    for item in claimed:
+        run_job(item)
+    return len(claimed)
+
+
+def purge_finished(days=7):
+    """
+    Borra los trabajos terminados con más de `days` días. Los fallidos se
+    quedan para poder revisarlos.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    n = db.session.execute(
+        delete(jobs).where(jobs.c.status == "done", jobs.c.created_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return n
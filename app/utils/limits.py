@@ -0,0 +1,231 @@
+import importlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+from .tenants import resolve_tenant_id
+
+
+# -------------------------
+#  TOKEN BUCKETS
+# -------------------------
+
+class MemoryBuckets:
+    """
+    Token buckets en memoria de este proceso (cada worker de gunicorn
+    cuenta por su lado). Se guardan a lo más `max_keys` claves; las que
+    llevan más tiempo sin usarse se sacan primero.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, cuándo)
+
+    def take(self, key, rate, burst):
+        """
+        Gasta un token de `key` (se rellena a `rate` por segundo hasta
+        `burst`). Regresa 0 si alcanzó, o los segundos que faltan para
+        que haya uno.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Mismo cálculo que MemoryBuckets.take, atómico dentro de Redis y con el
+# reloj de Redis (los workers pueden estar en otras máquinas)
+REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """
+    Token buckets compartidos por todos los workers en Redis. Recibe el
+    cliente ya hecho (redis.Redis o cualquier objeto con register_script).
+    """
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self.prefix = prefix
+        self._take = client.register_script(REDIS_TAKE)
+
+    def take(self, key, rate, burst):
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst]))
+
+
+def redis_backend(app):
+    import redis  # opcional: solo si RATE_LIMIT_BACKEND=redis
+
+    return RedisBuckets(redis.Redis.from_url(
+        app.config["RATE_LIMIT_REDIS_URL"], socket_timeout=0.2, socket_connect_timeout=0.2,
+    ))
+
+
+BACKENDS = {
+    "memory": lambda app: MemoryBuckets(),
+    "redis": redis_backend,
+}
+
+
+def resolve_backend(app):
+    """
+    Backend de RATE_LIMIT_BACKEND: un nombre de BACKENDS o una ruta
+    "modulo:funcion" (recibe la app y regresa un objeto con take()).
+    """
+    name = app.config["RATE_LIMIT_BACKEND"]
+    if ":" in name:
+        module, attr = name.split(":", 1)
+        return getattr(importlib.import_module(module), attr)(app)
+    return BACKENDS[name](app)
+
+
+# -------------------------
+#  CONTROL DE ADMISIÓN
+# -------------------------
+
+class Limiter:
+    """
+    Decide si un request público entra antes de que toque la BD:
+
+    - token bucket por cliente (IP) y por tenant -> 429
+    - requests públicos a la vez en este worker -> 503
+
+    Si el backend compartido falla se cuenta en memoria durante
+    RATE_LIMIT_RETRY_SECONDS en vez de tumbar los requests.
+    """
+
+    def __init__(self):
+        self.backend = self.local = MemoryBuckets()
+        self.slots = None
+        self.limit = 0
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._backend_down_until = 0.0
+        self.rejected = {"client": 0, "tenant": 0, "overloaded": 0}
+
+    def configure(self, app):
+        self.local = MemoryBuckets()
+        self.backend = resolve_backend(app)
+        self.limit = app.config["PUBLIC_MAX_CONCURRENT"]
+        self.slots = threading.BoundedSemaphore(self.limit) if self.limit > 0 else None
+
+    def take(self, key, per_minute, burst):
+        if per_minute <= 0:
+            return 0.0
+        rate = per_minute / 60
+        burst = max(1, burst)
+        if self.backend is not self.local and time.monotonic() >= self._backend_down_until:
+            try:
+                return self.backend.take(key, rate, burst)
+            except Exception:
+                self._backend_down_until = time.monotonic() + current_app.config["RATE_LIMIT_RETRY_SECONDS"]
+                current_app.logger.warning("rate limit backend unavailable, counting in memory", exc_info=True)
+        return self.local.take(key, rate, burst)
+
+    def check_rate(self):
+        """
+        (scope, segundos de espera) del primer bucket que no alcanzó, o None.
+        El del tenant solo se gasta si el cliente pasó, para que un solo
+        cliente no se acabe el del negocio.
+        """
+        cfg = current_app.config
+        checks = [("client", request.remote_addr or "unknown", "CLIENT")]
+        tenant_id = resolve_tenant_id()
+        if tenant_id:
+            checks.append(("tenant", tenant_id, "TENANT"))
+
+        for scope, key, name in checks:
+            wait = self.take(
+                f"{scope}:{key}", cfg[f"RATE_LIMIT_{name}_PER_MINUTE"], cfg[f"RATE_LIMIT_{name}_BURST"],
+            )
+            if wait > 0:
+                return scope, wait
+        return None
+
+    def enter(self):
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+        if self.slots is not None:
+            self.slots.release()
+
+    def count(self, reason):
+        with self._lock:
+            self.rejected[reason] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inFlight": self._in_flight,
+                "maxConcurrent": self.limit,
+                "rejected": dict(self.rejected),
+            }
+
+
+limiter = Limiter()
+
+
+def public_endpoint(view):
+    """
+    Marca una vista pública (sin login): pasa por los límites antes de
+    abrir la BD. Va arriba de @read_replica, que ya toma una conexión.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        rejected = limiter.check_rate()
+        if rejected:
+            scope, wait = rejected
+            limiter.count(scope)
+            return jsonify({"error": "rate_limited", "scope": scope}), 429, {
+                "Retry-After": str(max(1, math.ceil(wait))),
+            }
+
+        if not limiter.enter():
+            limiter.count("overloaded")
+            return jsonify({"error": "overloaded"}), 503, {"Retry-After": "1"}
+        try:
+            return view(*args, **kwargs)
+        finally:
+            limiter.leave()
+    return wrapper
+
+
+def init_limits(app):
+    limiter.configure(app)
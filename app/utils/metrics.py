@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from ..config import Config
+
+# Buckets de latencia en segundos (formato Prometheus)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+OTHER = "other"
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Métricas en memoria de este proceso (cada worker de gunicorn tiene las
+    suyas).
+
+    - Latencia por endpoint + tenant (histograma) y requests por status.
+    - Consultas SQL y tiempo en SQL por endpoint (eventos del engine).
+    - Últimas consultas lentas (> SLOW_QUERY_MS).
+
+    Para acotar las series, solo los primeros `max_tenants` tenants que
+    existen y responden bien tienen etiqueta propia; el resto cae en
+    "other".
+    """
+
+    def __init__(self, max_tenants=20, slow_query_ms=200, slow_samples=20):
+        self.max_tenants = max_tenants
+        self.slow_query_s = slow_query_ms / 1000
+        self._lock = threading.Lock()
+        self._tenants = set()
+        self.latency = {}    # (endpoint, tenant) -> Histogram
+        self.requests = {}   # (endpoint, method, status) -> n
+        self.sql_count = {}  # endpoint -> n
+        self.sql_time = {}   # endpoint -> segundos
+        self.slow = deque(maxlen=slow_samples)
+
+    def tenant_label(self, tenant_id, ok, exists=None):
+        """
+        `exists()` confirma que el tenant es real antes de darle etiqueta
+        (un ?tenant= inventado que regresa 200 no debe abrir series); solo
+        se llama cuando todavía cabe una etiqueta nueva.
+        """
+        if not tenant_id:
+            return "none"
+        with self._lock:
+            if tenant_id in self._tenants:
+                return tenant_id
+            if not ok or len(self._tenants) >= self.max_tenants:
+                return OTHER
+        if exists is not None and not exists():
+            return OTHER
+        with self._lock:
+            if tenant_id in self._tenants or len(self._tenants) < self.max_tenants:
+                self._tenants.add(tenant_id)
+                return tenant_id
+        return OTHER
+
+    def record_request(self, endpoint, method, status, tenant, seconds, sql_count, sql_time):
+        with self._lock:
+            hist = self.latency.get((endpoint, tenant))
+            if hist is None:
+                hist = self.latency[(endpoint, tenant)] = Histogram()
+            hist.observe(seconds)
+
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.sql_count[endpoint] = self.sql_count.get(endpoint, 0) + sql_count
+            self.sql_time[endpoint] = self.sql_time.get(endpoint, 0.0) + sql_time
+
+    def record_slow_query(self, endpoint, statement, seconds):
+        with self._lock:
+            self.slow.append((endpoint, " ".join(statement.split())[:200], seconds))
+
+    def render(self, extra=()):
+        """
+        Texto en formato de exposición de Prometheus.
+        """
+        lines = []
+        with self._lock:
+            lines.append("# HELP http_request_duration_seconds Latencia por endpoint y tenant.")
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for (endpoint, tenant), hist in sorted(self.latency.items()):
+                labels = f'endpoint="{_esc(endpoint)}",tenant="{_esc(tenant)}"'
+                for bound, n in zip(LATENCY_BUCKETS, hist.counts):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {hist.count}")
+
+            lines.append("# HELP http_requests_total Requests por endpoint, método y status.")
+            lines.append("# TYPE http_requests_total counter")
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{endpoint="{_esc(endpoint)}",method="{method}",status="{status}"}} {n}'
+                )
+
+            lines.append("# HELP sql_queries_total Sentencias SQL ejecutadas por endpoint.")
+            lines.append("# TYPE sql_queries_total counter")
+            for endpoint, n in sorted(self.sql_count.items()):
+                lines.append(f'sql_queries_total{{endpoint="{_esc(endpoint)}"}} {n}')
+
+            lines.append("# HELP sql_duration_seconds_total Tiempo en SQL por endpoint.")
+            lines.append("# TYPE sql_duration_seconds_total counter")
+            for endpoint, seconds in sorted(self.sql_time.items()):
+                lines.append(f'sql_duration_seconds_total{{endpoint="{_esc(endpoint)}"}} {seconds:.6f}')
+
+            lines.append("# HELP sql_slow_query_seconds Últimas consultas lentas (muestra).")
+            lines.append("# TYPE sql_slow_query_seconds gauge")
+            # una serie por consulta: la más lenta de las muestras
+            slowest = {}
+            for endpoint, statement, seconds in self.slow:
+                key = (endpoint, statement)
+                slowest[key] = max(seconds, slowest.get(key, 0.0))
+            for (endpoint, statement), seconds in sorted(slowest.items()):
+                lines.append(
+                    f'sql_slow_query_seconds{{endpoint="{_esc(endpoint)}",statement="{_esc(statement)}"}} {seconds:.6f}'
+                )
+
+        for name, kind, help_text, value in extra:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _esc(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+metrics = Metrics(
+    max_tenants=Config.METRICS_MAX_TENANTS,
+    slow_query_ms=Config.SLOW_QUERY_MS,
+)
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+# El inicio se guarda en el contexto de ejecución de cada sentencia (no en
+# una pila por conexión): si la sentencia truena no queda nada colgado que
+# desfase las siguientes mediciones.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None or not has_request_context():
+        return
+
+    elapsed = time.perf_counter() - started
+    g.sql_count = g.get("sql_count", 0) + 1
+    g.sql_time = g.get("sql_time", 0.0) + elapsed
+    if elapsed >= metrics.slow_query_s:
+        metrics.record_slow_query(_endpoint(), statement, elapsed)
+
+
+def init_metrics(app, *engines):
+    """
+    Mide cada request (latencia, consultas y tiempo en SQL) y lo junta en
+    `metrics`. Se llama una vez desde create_app con la primaria y las
+    réplicas.
+    """
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record(response):
+        started = g.pop("request_start", None)
+        if started is None or request.endpoint == "metrics.export":
+            return response
+
+        from .tenants import resolve_tenant_id, tenant_exists
+
+        tenant_id = resolve_tenant_id()
+        tenant = metrics.tenant_label(
+            tenant_id, response.status_code < 400, exists=lambda: tenant_exists(tenant_id),
+        )
+        metrics.record_request(
+            _endpoint(),
+            request.method,
+            response.status_code,
+            tenant,
+            time.perf_counter() - started,
+            g.get("sql_count", 0),
+            g.get("sql_time", 0.0),
+        )
+        return response
@@ -0,0 +1,22 @@
+import re
+
+NATIONAL_DIGITS = 10
+
+_non_digits = re.compile(r"\D")
+
+
+def normalize_phone(phone):
+    """
+    Deja solo los dígitos del número nacional, para que "686 123 4567",
+    "+52 6861234567" y "6861234567" sean el mismo cliente. Si trae lada
+    de país (más de 10 dígitos) se queda con los últimos 10.
+    Regresa None si no hay dígitos.
+    """
+    if phone is None:
+        return None
+    digits = _non_digits.sub("", str(phone))
+    if not digits:
+        return None
+    if len(digits) > NATIONAL_DIGITS:
+        digits = digits[-NATIONAL_DIGITS:]
+    return digits
@@ -0,0 +1,164 @@
+import importlib
+import json
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import select, tuple_
+
+from ..models import db, Appointment, Customer, Service, Tenant
+from .availability import hhmm, to_minutes
+from .jobs import enqueue_many, job
+
+# nombre -> función(message); REMINDER_DELIVERY elige cuál se usa
+DELIVERIES = {}
+
+
+def delivery(name):
+    def register(fn):
+        DELIVERIES[name] = fn
+        return fn
+    return register
+
+
+@delivery("log")
+def log_delivery(message):
+    current_app.logger.info("reminder for %s: %s", message["phone"], message["text"])
+
+
+# Para pruebas locales: guarda los mensajes en memoria
+sent_messages = []
+
+
+@delivery("memory")
+def memory_delivery(message):
+    sent_messages.append(message)
+
+
+@delivery("webhook")
+def webhook_delivery(message):
+    """
+    POST del mensaje en JSON a REMINDER_WEBHOOK_URL (el proveedor de SMS /
+    WhatsApp). Un error HTTP truena y el trabajo se reintenta.
+    """
+    url = current_app.config["REMINDER_WEBHOOK_URL"]
+    if not url:
+        raise RuntimeError("REMINDER_WEBHOOK_URL is not set")
+
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(message).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=10):
+        pass
+
+
+def get_delivery(name=None):
+    """
+    Función de envío configurada: un nombre de DELIVERIES o una ruta
+    "modulo:funcion" para conectar otra sin tocar este archivo.
+    """
+    name = name or current_app.config["REMINDER_DELIVERY"]
+    if ":" in name:
+        module, attr = name.split(":", 1)
+        return getattr(importlib.import_module(module), attr)
+    return DELIVERIES[name]
+
+
+def reminder_key(appointment_id, d, start_time):
+    # si la cita se reagenda, la nueva hora lleva su propio recordatorio
+    return f"reminder:{appointment_id}:{d.isoformat()}T{hhmm(to_minutes(start_time))}"
+
+
+def business_now():
+    """
+    Hora actual en la zona de REMINDER_TIMEZONE, sin tzinfo (como se
+    guardan date + start_time de las citas).
+    """
+    name = current_app.config["REMINDER_TIMEZONE"]
+    tz = timezone.utc if name.upper() == "UTC" else ZoneInfo(name)
+    return datetime.now(tz).replace(tzinfo=None)
+
+
+def scan_reminders(hours=None, now=None):
+    """
+    Encola un trabajo "reminder" por cada cita (de cualquier tenant) que
+    empieza en las próximas `hours` horas. Lee el índice (date, start_time)
+    solo en esa ventana; las que ya tienen recordatorio se saltan por el
+    dedupe_key, así que se puede correr seguido y desde varios workers.
+
+    Las citas se guardan en hora local del negocio, por eso `now` es la
+    hora en REMINDER_TIMEZONE (no la zona del servidor).
+    """
+    hours = hours or current_app.config["REMINDER_HOURS"]
+    now = now or business_now()
+    until = now + timedelta(hours=hours)
+
+    key = tuple_(Appointment.date, Appointment.start_time)
+    rows = db.session.execute(
+        select(
+            Appointment.id, Appointment.tenant_id, Appointment.date, Appointment.start_time,
+        ).where(
+            Appointment.date >= now.date(),
+            Appointment.date <= until.date(),
+            key > tuple_(now.date(), now.time()),
+            key <= tuple_(until.date(), until.time()),
+        )
+    ).all()
+
+    enqueue_many("reminder", [
+        {
+            "tenant_id": r.tenant_id,
+            "payload": {
+                "appointment_id": r.id,
+                "date": r.date.isoformat(),
+                "start_time": hhmm(to_minutes(r.start_time)),
+            },
+            "dedupe_key": reminder_key(r.id, r.date, r.start_time),
+        }
+        for r in rows
+    ])
+    return len(rows)
+
+
+@job("reminder")
+def send_reminder(payload):
+    row = db.session.execute(
+        select(
+            Appointment.date,
+            Appointment.start_time,
+            Appointment.tenant_id,
+            Customer.name.label("customer_name"),
+            Customer.phone,
+            Service.name.label("service_name"),
+            Tenant.name.label("tenant_name"),
+        )
+        .join(Customer, Customer.id == Appointment.customer_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .join(Tenant, Tenant.id == Appointment.tenant_id)
+        .where(Appointment.id == payload["appointment_id"])
+    ).first()
+
+    # la cita se borró o se movió después de encolar: nada que mandar
+    if row is None:
+        return
+    start_time = hhmm(to_minutes(row.start_time))
+    if row.date.isoformat() != payload["date"] or start_time != payload["start_time"]:
+        return
+
+    get_delivery()({
+        "tenantId": row.tenant_id,
+        "appointmentId": payload["appointment_id"],
+        "phone": row.phone,
+        "name": row.customer_name,
+        "service": row.service_name,
+        "date": payload["date"],
+        "startTime": start_time,
+        "text": (
+            f"Hola {row.customer_name}, te recordamos tu cita de {row.service_name} "
+            f"el {payload['date']} a las {start_time} en {row.tenant_name}."
+        ),
+    })
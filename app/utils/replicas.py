@@ -0,0 +1,166 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import DBAPIError
+
+# Bind keys de las réplicas en SQLALCHEMY_BINDS (ver config.replica_binds)
+REPLICA_PREFIX = "replica"
+
+# Cookie para que el navegador que acaba de escribir lea de la primaria
+# aunque su siguiente request caiga en otro worker
+PRIMARY_COOKIE = "db_primary_until"
+
+
+class RoutingSession(Session):
+    """
+    Session que manda las lecturas de un request marcado con
+    @read_replica a la réplica elegida para ese request. Todo lo demás
+    (escrituras, flush, requests sin marcar, scripts) va a la primaria.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, "is_dml", False):
+            replica = g.get("db_replica") if has_app_context() else None
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Estado por proceso: qué tenants escribieron hace poco (leen de la
+    primaria un rato para ver su propia escritura) y qué réplicas fallaron
+    (se saltan hasta que pasa REPLICA_RETRY_SECONDS).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._writes = {}  # tenant_id -> hasta cuándo leer de la primaria
+        self._down = {}    # bind key -> hasta cuándo no intentarla
+        self._turn = itertools.count()
+
+    def note_write(self, tenant_id, window):
+        if not tenant_id:
+            return
+        with self._lock:
+            self._writes[tenant_id.lower()] = time.monotonic() + window
+
+    def wrote_recently(self, tenant_id):
+        if not tenant_id:
+            return False
+        with self._lock:
+            until = self._writes.get(tenant_id.lower())
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self._writes[tenant_id.lower()]
+                return False
+            return True
+
+    def mark_down(self, key, retry_seconds):
+        with self._lock:
+            self._down[key] = time.monotonic() + retry_seconds
+
+    def candidates(self, keys):
+        """
+        Réplicas sanas en orden rotado (round robin entre requests).
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [k for k in keys if self._down.get(k, 0) <= now]
+        if not healthy:
+            return []
+        start = next(self._turn) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "down": sorted(k for k, until in self._down.items() if until > now),
+                "recentWriters": sum(1 for until in self._writes.values() if until > now),
+            }
+
+
+router = ReplicaRouter()
+
+
+def replica_keys(db):
+    return sorted(k for k in db.engines if k and k.startswith(REPLICA_PREFIX))
+
+
+def note_write(tenant_id):
+    """
+    Registra que el tenant escribió. Se llama desde bump_versions, que ya
+    corre en toda escritura de citas, servicios y horarios.
+    """
+    if not has_app_context() or not current_app.config.get("SQLALCHEMY_BINDS"):
+        return
+    router.note_write(tenant_id, current_app.config["REPLICA_READ_YOUR_WRITES_SECONDS"])
+    g.db_wrote = True
+
+
+def choose_replica():
+    """
+    Elige réplica para este request, o se queda en la primaria si no hay
+    réplicas, si el tenant (o este navegador) acaba de escribir, o si
+    ninguna réplica responde.
+    """
+    from ..models import db
+    from .tenants import resolve_tenant_id
+
+    keys = replica_keys(db)
+    if not keys:
+        return
+
+    if router.wrote_recently(resolve_tenant_id()):
+        return
+    if request.cookies.get(PRIMARY_COOKIE, type=float, default=0) > time.time():
+        return
+
+    for key in router.candidates(keys):
+        engine = db.engines[key]
+        try:
+            # abre la conexión ya: si la réplica está caída nos enteramos
+            # aquí y no a media respuesta
+            db.session.connection(bind_arguments={"bind": engine})
+        except DBAPIError:
+            db.session.rollback()
+            router.mark_down(key, current_app.config["REPLICA_RETRY_SECONDS"])
+            current_app.logger.warning("replica %s unavailable, using primary", key)
+            continue
+        g.db_replica = engine
+        return
+
+
+def read_replica(view):
+    """
+    Marca una vista de solo lectura: sus consultas pueden ir a una réplica.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        choose_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_replicas(app):
+    """
+    Después de una escritura deja una cookie para que ese navegador lea de
+    la primaria durante REPLICA_READ_YOUR_WRITES_SECONDS.
+    """
+    if not app.config.get("SQLALCHEMY_BINDS"):
+        return
+
+    @app.after_request
+    def remember_write(response):
+        if g.pop("db_wrote", False):
+            window = app.config["REPLICA_READ_YOUR_WRITES_SECONDS"]
+            response.set_cookie(
+                PRIMARY_COOKIE, f"{time.time() + window:.3f}", max_age=window, httponly=True,
+            )
+        return response
@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, literal_column, select
+
+from ..models import db, Appointment, DailyRollup
+from .availability import to_minutes
+from .versions import _upserts
+
+rollups = DailyRollup.__table__
+appointments = Appointment.__table__
+
+
+def rollup_row(appt):
+    """
+    Lo que aporta una cita a los totales: (date, service_id, minutos, precio).
+    Sirve para guardar cómo estaba una cita antes de modificarla.
+    """
+    return (
+        appt.date,
+        appt.service_id,
+        to_minutes(appt.end_time) - to_minutes(appt.start_time),
+        appt.price or 0,
+    )
+
+
+def update_rollups(tenant_id, added=(), removed=()):
+    """
+    Suma las citas `added` y resta las `removed` (tuplas de rollup_row) en
+    un solo upsert por (día, servicio) dentro de la transacción actual.
+    """
+    totals = defaultdict(lambda: [0, 0, 0])
+    for sign, rows in ((1, added), (-1, removed)):
+        for d, service_id, minutes, price in rows:
+            t = totals[(d, service_id)]
+            t[0] += sign
+            t[1] += sign * minutes
+            t[2] += sign * price
+
+    params = [
+        {
+            "tenant_id": tenant_id, "date": d, "service_id": service_id,
+            "bookings": n, "booked_minutes": minutes, "revenue": revenue,
+        }
+        for (d, service_id), (n, minutes, revenue) in sorted(totals.items())
+        if n or minutes or revenue
+    ]
+    if not tenant_id or not params:
+        return
+
+    stmt = _upserts[db.engine.dialect.name](rollups)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "date", "service_id"],
+        set_={
+            "bookings": rollups.c.bookings + stmt.excluded.bookings,
+            "booked_minutes": rollups.c.booked_minutes + stmt.excluded.booked_minutes,
+            "revenue": rollups.c.revenue + stmt.excluded.revenue,
+        },
+    )
+    db.session.execute(stmt, params)
+
+
+def _minutes_sql(dialect):
+    if dialect == "postgresql":
+        return literal_column("(EXTRACT(EPOCH FROM (appointments.end_time - appointments.start_time)) / 60)")
+    return literal_column("((strftime('%s', appointments.end_time) - strftime('%s', appointments.start_time)) / 60)")
+
+
+def rebuild_rollups(tenant_id=None):
+    """
+    Borra y rearma los totales desde la tabla de citas con un
+    INSERT ... SELECT agrupado. Es el backfill / job de reparación.
+    """
+    minutes = _minutes_sql(db.engine.dialect.name)
+
+    query = select(
+        appointments.c.tenant_id,
+        appointments.c.date,
+        appointments.c.service_id,
+        func.count(),
+        func.coalesce(func.sum(minutes), 0),
+        func.coalesce(func.sum(appointments.c.price), 0),
+    ).group_by(
+        appointments.c.tenant_id, appointments.c.date, appointments.c.service_id,
+    )
+    clear = delete(rollups)
+    if tenant_id:
+        query = query.where(appointments.c.tenant_id == tenant_id)
+        clear = clear.where(rollups.c.tenant_id == tenant_id)
+
+    db.session.execute(clear)
+    return db.session.execute(
+        insert(rollups).from_select(
+            ["tenant_id", "date", "service_id", "bookings", "booked_minutes", "revenue"],
+            query,
+        )
+    ).rowcount
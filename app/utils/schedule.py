@@ -0,0 +1,127 @@
+from ..config import Config
+from ..models import db, ScheduleException
+from .availability import js_weekday, to_minutes
+from .tenants import TenantCache
+from .versions import tenant_version
+
+# Defaults cuando el tenant no ha configurado su horario
+DEFAULT_HOURS = {
+    "week": ("10:00", "19:00"),
+    "sat": ("10:00", "16:00"),
+    "sun": ("10:00", "16:00"),
+}
+DEFAULT_WORKING_DAYS = [1, 2, 3, 4, 5, 6]  # 0 = domingo (getDay de JS)
+
+
+def parse_hhmm(value):
+    hour, minute = value.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def parse_working_days(value):
+    if not value:
+        return list(DEFAULT_WORKING_DAYS)
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+class Schedule:
+    """
+    Horario compilado de un tenant: ventanas en minutos por día de la
+    semana más días cerrados y con horario especial. hours_for() y allows()
+    son O(1).
+    """
+
+    __slots__ = ("tenant_id", "settings", "windows", "exceptions")
+
+    def __init__(self, tenant, exceptions=()):
+        self.tenant_id = tenant.id
+
+        week = (tenant.hours_start_week or DEFAULT_HOURS["week"][0],
+                tenant.hours_end_week or DEFAULT_HOURS["week"][1])
+        sat = (tenant.hours_start_sat or DEFAULT_HOURS["sat"][0],
+               tenant.hours_end_sat or DEFAULT_HOURS["sat"][1])
+        sun = (tenant.hours_start_sun or DEFAULT_HOURS["sun"][0],
+               tenant.hours_end_sun or DEFAULT_HOURS["sun"][1])
+        working_days = parse_working_days(tenant.working_days)
+
+        # lo mismo que regresan /admin/settings y /availability/week
+        self.settings = {
+            "weekStart": week[0], "weekEnd": week[1],
+            "satStart": sat[0], "satEnd": sat[1],
+            "sunStart": sun[0], "sunEnd": sun[1],
+            "workingDays": working_days,
+        }
+
+        by_weekday = {0: sun, 6: sat}
+        windows = []
+        for weekday in range(7):
+            start, end = by_weekday.get(weekday, week)
+            windows.append(
+                (parse_hhmm(start), parse_hhmm(end)) if weekday in working_days else None
+            )
+        self.windows = tuple(windows)
+
+        # date -> (open, close) o None si ese día está cerrado
+        self.exceptions = {}
+        for e in exceptions:
+            if e.start_time is None or e.end_time is None:
+                self.exceptions[e.date] = None
+            else:
+                self.exceptions[e.date] = (to_minutes(e.start_time), to_minutes(e.end_time))
+
+    def hours_for(self, d):
+        """
+        (open, close) en minutos para ese día, o None si no abre.
+        """
+        if d in self.exceptions:
+            return self.exceptions[d]
+        return self.windows[js_weekday(d)]
+
+    def allows(self, d, start, end):
+        """
+        True si [start, end) (minutos) cae dentro del horario de ese día.
+        """
+        hours = self.hours_for(d)
+        return hours is not None and hours[0] <= start and end <= hours[1]
+
+    def signature(self):
+        """
+        Valor estable que cambia cuando cambia el horario (para ETags).
+        """
+        return (self.windows, tuple(sorted(self.exceptions.items())))
+
+
+schedule_cache = TenantCache(
+    maxsize=Config.TENANT_CACHE_SIZE,
+    ttl=Config.TENANT_CACHE_TTL,
+    recheck=Config.TENANT_CACHE_RECHECK,
+)
+
+
+def get_schedule(tenant):
+    """
+    Horario compilado del tenant, cacheado por proceso. Se arma una vez
+    por versión del tenant (TENANT_WIDE en calendar_versions): update_settings
+    y los cambios de excepciones la suben, así que los demás workers lo
+    rearman a más tardar TENANT_CACHE_RECHECK segundos después.
+    invalidate_schedule() lo hace de inmediato en el worker que hizo el
+    cambio.
+    """
+    key = ("id", tenant.id.lower())
+    schedule = schedule_cache.get(key, version=lambda _: tenant_version(tenant.id))
+    if schedule is TenantCache.MISSING:
+        # la versión antes que las excepciones: si cambian en medio, la
+        # entrada queda con la versión vieja y se rearma en el siguiente
+        version = tenant_version(tenant.id)
+        exceptions = db.session.query(
+            ScheduleException.date,
+            ScheduleException.start_time,
+            ScheduleException.end_time,
+        ).filter(ScheduleException.tenant_id == tenant.id).all()
+        schedule = Schedule(tenant, exceptions)
+        schedule_cache.set(key, schedule, version)
+    return schedule
+
+
+def invalidate_schedule(tenant_id):
+    schedule_cache.invalidate(tenant_id=tenant_id)
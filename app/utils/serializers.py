@@ -0,0 +1,77 @@
+def _date(value):
+    return value.isoformat()
+
+
+def _hhmm(value):
+    return f"{value.hour:02d}:{value.minute:02d}"
+
+
+def _datetime(value):
+    return value.isoformat()
+
+
+# tipo -> (formateo, ¿se repite mucho entre filas?)
+FORMATS = {
+    "date": (_date, True),
+    "time": (_hhmm, True),
+    "datetime": (_datetime, False),
+}
+
+
+class RowSerializer:
+    """
+    Convierte las tuplas de un select de columnas (sin objetos del ORM) a
+    dicts para JSON. Las columnas y su formato se fijan una vez:
+
+        APPOINTMENTS = RowSerializer(("id", None), ("date", "date"), ...)
+        APPOINTMENTS.many(db.session.execute(select(...)))
+
+    Fechas y horas se repiten mucho en un listado (30 días, unas decenas de
+    horas de inicio), así que cada valor distinto se formatea una sola vez
+    por llamada. None se deja como None.
+    """
+
+    __slots__ = ("keys", "kinds")
+
+    def __init__(self, *fields):
+        self.keys = tuple(key for key, _ in fields)
+        self.kinds = tuple(kind for _, kind in fields)
+        for kind in self.kinds:
+            if kind is not None and kind not in FORMATS:
+                raise ValueError(f"unknown column format {kind!r}")
+
+    def _converters(self):
+        converters = []
+        for i, kind in enumerate(self.kinds):
+            if kind is None:
+                continue
+            fmt, repeats = FORMATS[kind]
+            if repeats:
+                cache = {None: None}
+
+                def convert(value, fmt=fmt, cache=cache):
+                    try:
+                        return cache[value]
+                    except KeyError:
+                        cache[value] = out = fmt(value)
+                        return out
+            else:
+                def convert(value, fmt=fmt):
+                    return None if value is None else fmt(value)
+            converters.append((i, convert))
+        return converters
+
+    def iter(self, rows):
+        """
+        Generador de dicts (para exportar en streaming sin juntar todo).
+        """
+        keys = self.keys
+        converters = self._converters()
+        for row in rows:
+            values = list(row)
+            for i, convert in converters:
+                values[i] = convert(values[i])
+            yield dict(zip(keys, values))
+
+    def many(self, rows):
+        return list(self.iter(rows))
@@ -1,5 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
 from flask import request
-from ..models import Tenant
+from ..config import Config
+from ..models import db, Tenant, CalendarVersion
+from .versions import TENANT_WIDE, tenant_version
+
+
+class TenantCache:
+    """
+    Caché en memoria (por proceso) de tenants, por id y por dominio.
+
+    - LRU acotado a `maxsize` entradas, cada una vive `ttl` segundos.
+    - También guarda los "no existe" para que subdominios inventados no
+      peguen a la BD en cada request.
+    - Guarda copias de solo lectura, no objetos de la sesión.
+
+    Cada worker tiene su propio caché. Para que un cambio hecho en otro
+    worker se note pronto, cada entrada guarda la versión del tenant
+    (fila TENANT_WIDE de calendar_versions, que suben todas las escrituras
+    de horarios, servicios y settings) y get() la compara con la actual,
+    pero a lo más una vez cada `recheck` segundos por entrada: los aciertos
+    dentro de esa ventana no tocan la BD. Los "no existe" nunca se revisan
+    contra la BD, solo caducan por TTL.
+    """
+
+    MISSING = object()
+
+    def __init__(self, maxsize=1024, ttl=60, recheck=2):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.recheck = recheck
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key, version=None):
+        """
+        Regresa el valor guardado (None si se guardó un "no existe") o
+        MISSING si no hay entrada vigente.
+
+        `version(value)` da la versión actual: si no es la que se guardó con
+        set(), la entrada ya no sirve. Solo se llama para valores que sí
+        existen y cuando pasaron `recheck` segundos desde la última revisión.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return self.MISSING
+
+        # fuera del candado: puede ir a la BD
+        check = version is not None and entry[1] is not None and entry[3] + self.recheck <= now
+        current = version(entry[1]) if check else None
+
+        with self._lock:
+            if check and current != entry[2]:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+                self.stale += 1
+                self.misses += 1
+                return self.MISSING
+
+            if check and self._data.get(key) is entry:
+                self._data[key] = (entry[0], entry[1], entry[2], now)
+            if key in self._data:
+                self._data.move_to_end(key)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            now = time.monotonic()
+            self._data[key] = (now + self.ttl, value, version, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tenant_id=None, domain=None):
+        with self._lock:
+            if tenant_id:
+                self._data.pop(("id", tenant_id.lower()), None)
+            if domain:
+                self._data.pop(("domain", domain.lower()), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "recheck": self.recheck,
+                "hits": self.hits,
+                "negativeHits": self.negative_hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+            }
+
+
+tenant_cache = TenantCache(
+    maxsize=Config.TENANT_CACHE_SIZE,
+    ttl=Config.TENANT_CACHE_TTL,
+    recheck=Config.TENANT_CACHE_RECHECK,
+)
+
+
+def _snapshot(tenant):
+    if tenant is None:
+        return None
+    return SimpleNamespace(**{
+        c.name: getattr(tenant, c.name) for c in Tenant.__table__.columns
+    })
+
+
+def _cached_lookup(kind, value, **filters):
+    key = (kind, value.lower())
+
+    cached = tenant_cache.get(key, version=lambda tenant: tenant_version(tenant.id))
+    if cached is not TenantCache.MISSING:
+        return cached
+
+    # el tenant y su versión en la misma consulta, para no guardar datos
+    # viejos con una versión nueva
+    row = db.session.query(Tenant, CalendarVersion.version).outerjoin(
+        CalendarVersion,
+        db.and_(CalendarVersion.tenant_id == Tenant.id, CalendarVersion.date == TENANT_WIDE),
+    ).filter(*(getattr(Tenant, k) == v for k, v in filters.items())).first()
+    tenant, version = (_snapshot(row[0]), row[1] or 0) if row else (None, None)
+
+    tenant_cache.set(key, tenant, version)
+
+    # una búsqueda por dominio también deja listo el caché por id
+    if tenant is not None and kind == "domain":
+        tenant_cache.set(("id", tenant.id.lower()), tenant, version)
+
+    return tenant
+
+
+def invalidate_tenant(tenant_id=None, domain=None):
+    """
+    Hay que llamarla después de crear o modificar un tenant.
+    """
+    tenant_cache.invalidate(tenant_id=tenant_id, domain=domain)
+
 
 def resolve_tenant_id():
     """
@@ -26,11 +187,27 @@ def resolve_tenant_id():
 
 def get_tenant():
     """
-    Regresa el OBJETO Tenant desde la BD.
+    Regresa el Tenant (copia de solo lectura, cacheada).
+    Para modificarlo hay que cargarlo de la BD con Tenant.query.
     """
     tenant_id = resolve_tenant_id()
 
     if not tenant_id:
         return None
 
-    return Tenant.query.filter_by(id=tenant_id).first()
+    return _cached_lookup("id", tenant_id, id=tenant_id)
+
+
+def tenant_exists(tenant_id):
+    """
+    True si hay un tenant con ese id (por el caché, sin ir a la BD si ya
+    se buscó).
+    """
+    return bool(tenant_id) and _cached_lookup("id", tenant_id, id=tenant_id) is not None
+
+
+def get_tenant_by_domain(domain):
+    """
+    Igual que get_tenant pero buscando por dominio completo.
+    """
+    return _cached_lookup("domain", domain, domain=domain)
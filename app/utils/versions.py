@@ -0,0 +1,106 @@
+import hashlib
+from datetime import date
+
+from flask import g, has_app_context, request
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..models import db, CalendarVersion
+from .replicas import note_write
+
+# Fila "del tenant" para cambios que afectan todos los días
+# (horarios, servicios).
+TENANT_WIDE = date(1970, 1, 1)
+
+# Fila para cambios en datos de clientes que salen junto a las citas
+# (nombre, teléfono, visitas); ver utils/customer_stats.py.
+CUSTOMERS = date(1970, 1, 2)
+
+_upserts = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def bump_versions(tenant_id, dates):
+    """
+    Sube la versión de cada día en `dates` dentro de la transacción actual.
+    Hay que llamarla antes del commit en toda escritura de citas. También
+    manda al tenant a leer de la primaria un rato (utils/replicas.py).
+    """
+    dates = sorted(set(d for d in dates if d is not None))
+    if not tenant_id or not dates:
+        return
+
+    note_write(tenant_id)
+    if TENANT_WIDE in dates and has_app_context():
+        g.pop("tenant_versions", None)
+
+    insert = _upserts[db.engine.dialect.name]
+    stmt = insert(CalendarVersion.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "date"],
+        set_={"version": CalendarVersion.__table__.c.version + 1},
+    )
+    db.session.execute(stmt, [
+        {"tenant_id": tenant_id, "date": d, "version": 1} for d in dates
+    ])
+
+
+def bump_tenant_version(tenant_id):
+    bump_versions(tenant_id, [TENANT_WIDE])
+
+
+def tenant_version(tenant_id):
+    """
+    Versión TENANT_WIDE del tenant (0 si nunca cambió): la usan los cachés
+    por proceso de tenants y horarios para notar cambios hechos en otros
+    workers. Se lee una vez por request (primary key de calendar_versions).
+    """
+    memo = g.setdefault("tenant_versions", {}) if has_app_context() else {}
+    if tenant_id not in memo:
+        memo[tenant_id] = db.session.query(CalendarVersion.version).filter(
+            CalendarVersion.tenant_id == tenant_id,
+            CalendarVersion.date == TENANT_WIDE,
+        ).scalar() or 0
+    return memo[tenant_id]
+
+
+def calendar_etag(tenant_id, start_date, end_date, *extra, customers=False):
+    """
+    ETag de una lectura de calendario para los días [start_date, end_date).
+    Solo lee calendar_versions, nunca la tabla de citas.
+
+    `extra` son otros valores que salen en la respuesta y no vienen de la
+    BD en ese momento (p. ej. horarios del tenant cacheado). Con
+    `customers=True` también cubre la fila CUSTOMERS, para respuestas que
+    incluyen datos de los clientes.
+    """
+    shared = [TENANT_WIDE, CUSTOMERS] if customers else [TENANT_WIDE]
+    rows = db.session.query(
+        CalendarVersion.date, CalendarVersion.version
+    ).filter(
+        CalendarVersion.tenant_id == tenant_id,
+        db.or_(
+            CalendarVersion.date.in_(shared),
+            db.and_(
+                CalendarVersion.date >= start_date,
+                CalendarVersion.date < end_date,
+            ),
+        ),
+    ).order_by(CalendarVersion.date).all()
+
+    h = hashlib.sha1(request.full_path.encode())
+    h.update(f"{start_date}:{end_date}:{extra!r}".encode())
+    for d, version in rows:
+        h.update(f"|{d}:{version}".encode())
+    return h.hexdigest()
+
+
+def not_modified(etag):
+    """
+    Respuesta 304 si el cliente ya tiene esta versión (If-None-Match),
+    o None para seguir armando la respuesta normal.
+    """
+    if etag in request.if_none_match:
+        return "", 304, {"ETag": f'"{etag}"'}
+    return None
@@ -0,0 +1,78 @@
+import argparse
+import multiprocessing
+import signal
+import time
+
+from app import create_app
+from app.models import db
+
+
+def work(once=False, batch=10):
+    """
+    Loop de un proceso worker: cada REMINDER_SCAN_SECONDS encola
+    recordatorios y limpia trabajos y tombstones viejos; el resto del
+    tiempo toma lotes de la cola y duerme WORKER_POLL_SECONDS cuando no
+    hay nada.
+
+    Con `once` vacía la cola y termina (útil en cron o pruebas).
+    """
+    from app.utils.changes import purge_tombstones
+    from app.utils.jobs import purge_finished, run_pending
+    from app.utils.reminders import scan_reminders  # también registra el trabajo "reminder"
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+    app = create_app()
+    with app.app_context():
+        cfg = app.config
+        next_scan = 0.0
+
+        while not stopping:
+            if time.monotonic() >= next_scan:
+                scan_reminders()
+                db.session.commit()
+                purge_finished()
+                purge_tombstones(cfg["TOMBSTONE_RETENTION_DAYS"])
+                next_scan = time.monotonic() + cfg["REMINDER_SCAN_SECONDS"]
+
+            if run_pending(batch):
+                continue
+            if once:
+                break
+            time.sleep(cfg["WORKER_POLL_SECONDS"])
+
+
+def run(argv=None):
+    """
+        python -m app.worker [--processes 2] [--batch 10] [--once]
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.worker")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.processes <= 1:
+        work(args.once, args.batch)
+        return
+
+    # cada proceso arma su propia app (y su pool de conexiones)
+    procs = [
+        multiprocessing.Process(target=work, args=(args.once, args.batch))
+        for _ in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+
+    def stop(*_):
+        for p in procs:
+            p.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,18 @@
+"""
+Benchmarks contra una BD local (SQLite en /tmp si no hay DATABASE_URL).
+
+    python -m bench                 suite de todas las rutas con baseline (suite.py)
+    python -m bench.booking         latencia de reserva vs. citas por día
+    python -m bench.contention      reservas concurrentes y dobles reservas
+    python -m bench.day_view        consultas de /appointments/day (sin N+1)
+    python -m bench.load            throughput con gunicorn y varios workers
+    python -m bench.serialize       CPU y memoria por fila al armar listados
+    python -m bench.startup         arranque en frío de un worker
+"""
+import os
+
+# Los benchmarks pegan miles de veces desde la misma IP: sin límites por
+# cliente/tenant ni tope de concurrencia (utils/limits.py), salvo que se
+# pidan explícitamente. Los subprocesos (load, startup) los heredan.
+for _name in ("RATE_LIMIT_CLIENT_PER_MINUTE", "RATE_LIMIT_TENANT_PER_MINUTE", "PUBLIC_MAX_CONCURRENT"):
+    os.environ.setdefault(_name, "0")
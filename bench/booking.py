@@ -0,0 +1,102 @@
+"""
+Benchmark de la revisión de traslapes al agendar.
+
+Siembra N citas en un mismo tenant + día y mide la latencia de
+POST /appointments/ tanto para un horario ocupado (409) como para uno libre
+(201). Con la revisión en una sola lectura al índice, la latencia debe
+mantenerse plana de 10 a 10,000 citas por día.
+
+Uso:
+    python -m bench.booking
+    DATABASE_URL=postgresql://... python -m bench.booking
+
+Sin DATABASE_URL se usa SQLite en memoria.
+"""
+import os
+import statistics
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app import create_app  # noqa: E402
+from app.models import db, Tenant, Service, Customer, Appointment  # noqa: E402
+
+TENANT_ID = "bench"
+DAY = date(2030, 1, 7)
+SIZES = [10, 100, 1000, 10000]
+ROUNDS = 50
+
+
+def seed(n):
+    db.session.query(Appointment).filter_by(tenant_id=TENANT_ID).delete()
+    db.session.commit()
+
+    # n citas de 5 segundos desde las 00:00, sin traslapes entre sí
+    base = datetime.combine(DAY, time(0, 0))
+    rows = []
+    for i in range(n):
+        start = base + timedelta(seconds=5 * i)
+        rows.append({
+            "tenant_id": TENANT_ID,
+            "customer_id": 1,
+            "service_id": 1,
+            "date": DAY,
+            "start_time": start.time(),
+            "end_time": (start + timedelta(seconds=5)).time(),
+            "blocks": 1,
+        })
+    db.session.execute(db.insert(Appointment), rows)
+    db.session.commit()
+
+
+def timed_post(client, start_time):
+    t0 = clock.perf_counter()
+    res = client.post(f"/appointments/?tenant={TENANT_ID}", json={
+        "phone": "6860000000",
+        "service_id": 1,
+        "date": DAY.isoformat(),
+        "start_time": start_time,
+    })
+    return (clock.perf_counter() - t0) * 1000, res.status_code
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        db.create_all()
+        if not db.session.get(Tenant, TENANT_ID):
+            db.session.add(Tenant(id=TENANT_ID, name="Bench", hours_start_week="00:00",
+                                  hours_end_week="23:59", working_days="0,1,2,3,4,5,6"))
+            db.session.add(Service(id=1, tenant_id=TENANT_ID, name="Corte", duration_minutes=15, price=100))
+            db.session.add(Customer(id=1, tenant_id=TENANT_ID, phone="6860000000", name="Bench", visits=0))
+            db.session.commit()
+
+        print(f"{'citas/día':>10} {'409 p50 ms':>12} {'201 p50 ms':>12}")
+        for n in SIZES:
+            seed(n)
+
+            busy = [timed_post(client, "00:00") for _ in range(ROUNDS)]
+            assert all(code == 409 for _, code in busy), busy[:3]
+
+            # horarios libres después de la última cita sembrada
+            free = []
+            for i in range(ROUNDS):
+                slot = (datetime(2000, 1, 1, 16, 0) + timedelta(minutes=15 * (i % 16))).strftime("%H:%M")
+                if i and i % 16 == 0:
+                    db.session.query(Appointment).filter(
+                        Appointment.tenant_id == TENANT_ID,
+                        Appointment.start_time >= time(16, 0),
+                    ).delete()
+                    db.session.commit()
+                free.append(timed_post(client, slot))
+            assert all(code == 201 for _, code in free), free[:3]
+
+            print(f"{n:>10} {statistics.median(ms for ms, _ in busy):>12.2f} "
+                  f"{statistics.median(ms for ms, _ in free):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
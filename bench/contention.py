@@ -0,0 +1,124 @@
+"""
+Benchmark de reservas concurrentes.
+
+Varios hilos intentan agendar a la vez los mismos horarios:
+- "mismo día": todos contra el mismo tenant + día (máxima contención).
+- "otros días": cada hilo en su propio tenant, deben avanzar en paralelo.
+
+Reporta reservas/s, cuántas respuestas fueron 201/409/error y cuántas
+citas quedaron traslapadas (doble reserva). Con --no-lock se desactiva el
+lock por tenant + día para comparar.
+
+Uso:
+    DATABASE_URL=postgresql://... python -m bench.contention
+    python -m bench.contention [--no-lock]     # SQLite en /tmp
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+if not os.getenv("DATABASE_URL"):
+    path = os.path.join(tempfile.gettempdir(), "agenda_contention.db")
+    if os.path.exists(path):
+        os.remove(path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+from app import create_app  # noqa: E402
+from app.models import db, Tenant, Service, Customer, Appointment  # noqa: E402
+
+THREADS = int(os.getenv("CONTENTION_THREADS", "8"))
+ATTEMPTS = int(os.getenv("CONTENTION_ATTEMPTS", "40"))
+DAY = date(2030, 1, 7)
+SLOTS = [f"{h:02d}:00" for h in range(10, 18)]
+
+
+def seed(app):
+    with app.app_context():
+        db.create_all()
+        for i in range(THREADS + 1):
+            tenant_id = f"bench{i}"
+            if db.session.get(Tenant, tenant_id):
+                continue
+            db.session.add(Tenant(id=tenant_id, name=tenant_id))
+            db.session.add(Service(id=i + 1, tenant_id=tenant_id, name="Corte", duration_minutes=60, price=100))
+            db.session.add(Customer(tenant_id=tenant_id, phone="6860000000", name="Bench", visits=0))
+        db.session.commit()
+        db.session.query(Appointment).delete()
+        db.session.commit()
+
+
+def book(client, tenant_index, slot):
+    res = client.post(f"/appointments/?tenant=bench{tenant_index}", json={
+        "phone": "6860000000",
+        "service_id": tenant_index + 1,
+        "date": DAY.isoformat(),
+        "start_time": slot,
+    })
+    return res.status_code
+
+
+def run(app, same_day):
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+
+    def worker(n):
+        client = app.test_client()
+        tenant_index = 0 if same_day else n + 1
+        barrier.wait()
+        for i in range(ATTEMPTS):
+            try:
+                status = book(client, tenant_index, SLOTS[i % len(SLOTS)])
+            except Exception:
+                status = "error"
+            with lock:
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    return statuses, THREADS * ATTEMPTS / elapsed
+
+
+def double_bookings(app):
+    with app.app_context():
+        rows = db.session.query(
+            Appointment.tenant_id, Appointment.date, Appointment.start_time, Appointment.end_time
+        ).order_by(Appointment.tenant_id, Appointment.date, Appointment.start_time).all()
+
+    overlaps = 0
+    for prev, cur in zip(rows, rows[1:]):
+        if prev[:2] == cur[:2] and cur.start_time < prev.end_time:
+            overlaps += 1
+    return overlaps, len(rows)
+
+
+def main():
+    if "--no-lock" in sys.argv:
+        import app.routes.appointments as appointments
+        appointments.lock_day = lambda tenant_id, d: None
+
+    app = create_app()
+    seed(app)
+
+    print(f"{'escenario':>12} {'intentos/s':>11} {'201':>5} {'409':>5} {'otros':>6} {'traslapes':>10}")
+    for name, same_day in (("mismo día", True), ("otros días", False)):
+        seed(app)
+        statuses, rate = run(app, same_day)
+        overlaps, total = double_bookings(app)
+        others = sum(v for k, v in statuses.items() if k not in (201, 409))
+        print(f"{name:>12} {rate:>11.0f} {statuses[201]:>5} {statuses[409]:>5} {others:>6} "
+              f"{overlaps:>4}/{total:<5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Revisa que GET /appointments/day haga el mismo número de consultas con 1
+cita que con muchas (sin N+1). Sale con error si el conteo crece.
+
+Uso:
+    python -m bench.day_view
+"""
+import os
+import sys
+from datetime import date, time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app import create_app  # noqa: E402
+from app.models import db, Tenant, Service, Customer, Appointment  # noqa: E402
+from bench.queries import count_queries  # noqa: E402
+
+TENANT_ID = "bench"
+DAY = date(2030, 1, 7)
+
+
+def add_appointments(n, offset):
+    for i in range(n):
+        hour, minute = divmod(offset + i, 60)
+        db.session.add(Appointment(
+            tenant_id=TENANT_ID,
+            customer_id=(i % 3) + 1,
+            service_id=(i % 2) + 1,
+            date=DAY,
+            start_time=time(hour % 24, minute),
+            end_time=time(hour % 24, minute, 30),
+            blocks=1,
+        ))
+    db.session.commit()
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+    url = f"/appointments/day?tenant={TENANT_ID}&date={DAY.isoformat()}"
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Tenant(id=TENANT_ID, name="Bench"))
+        for i in (1, 2):
+            db.session.add(Service(id=i, tenant_id=TENANT_ID, name=f"S{i}", duration_minutes=30, price=100))
+        for i in (1, 2, 3):
+            db.session.add(Customer(id=i, tenant_id=TENANT_ID, phone=f"686000000{i}", name=f"C{i}", visits=0))
+        db.session.commit()
+
+        counts = {}
+        total = 0
+        for n in (1, 50):
+            add_appointments(n - total, total)
+            total = n
+            client.get(url)  # calienta el caché de tenants
+            with count_queries(db.engine) as q:
+                res = client.get(url)
+            assert res.status_code == 200 and len(res.json) == n
+            counts[n] = q.count
+
+    print(f"consultas por request: {counts}")
+    if counts[1] != counts[50]:
+        print("ERROR: el número de consultas crece con las citas (N+1)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
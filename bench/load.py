@@ -0,0 +1,126 @@
+"""
+Prueba de carga: levanta gunicorn con 1, 2 y 4 workers y mide cuántos
+requests por segundo atiende en /availability/week y POST /appointments/.
+
+Uso:
+    DATABASE_URL=postgresql://... python -m bench.load
+    python -m bench.load            # SQLite en /tmp (las escrituras se serializan)
+
+Variables: LOAD_WORKERS="1,2,4", LOAD_SECONDS=5, LOAD_CLIENTS=16
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+
+WORKERS = [int(w) for w in os.getenv("LOAD_WORKERS", "1,2,4").split(",")]
+SECONDS = float(os.getenv("LOAD_SECONDS", "5"))
+CLIENTS = int(os.getenv("LOAD_CLIENTS", "16"))
+PORT = 5099
+TENANT_ID = "bench"
+
+
+def seed(env):
+    subprocess.run([sys.executable, "-m", "app.migrate"], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    code = f"""
+from app import create_app
+from app.models import db, Tenant, Service, Customer
+app = create_app()
+with app.app_context():
+    if not db.session.get(Tenant, "{TENANT_ID}"):
+        db.session.add(Tenant(id="{TENANT_ID}", name="Bench", domain="{TENANT_ID}.demoagenda.shop"))
+        db.session.add(Service(tenant_id="{TENANT_ID}", name="Corte", duration_minutes=30, price=100))
+        db.session.add(Customer(tenant_id="{TENANT_ID}", phone="6860000000", name="Bench", visits=0))
+        db.session.commit()
+"""
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def wait_ready(url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("gunicorn no arrancó")
+
+
+def hit(kind, base, service_id):
+    if kind == "availability":
+        req = urllib.request.Request(f"{base}/availability/week?tenant={TENANT_ID}")
+    else:
+        day = date.today() + timedelta(days=random.randint(1, 3650))
+        slot = f"{random.randint(8, 19):02d}:{random.choice(['00', '30'])}"
+        body = json.dumps({"phone": "6860000000", "service_id": service_id,
+                           "date": day.isoformat(), "start_time": slot}).encode()
+        req = urllib.request.Request(f"{base}/appointments/?tenant={TENANT_ID}", data=body,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as res:
+            return res.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def run_clients(kind, base, service_id):
+    done = []
+    stop = time.time() + SECONDS
+
+    def client():
+        ok = errors = 0
+        while time.time() < stop:
+            status = hit(kind, base, service_id)
+            # 409 (horario ocupado) es una respuesta válida del booking
+            if status in (200, 201, 409):
+                ok += 1
+            else:
+                errors += 1
+        done.append((ok, errors))
+
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(d[0] for d in done) / SECONDS, sum(d[1] for d in done)
+
+
+def main():
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL"):
+        env["DATABASE_URL"] = f"sqlite:///{tempfile.gettempdir()}/agenda_load.db"
+    seed(env)
+    base = f"http://127.0.0.1:{PORT}"
+
+    print(f"{'workers':>8} {'endpoint':>14} {'req/s':>10} {'errores':>8}")
+    for workers in WORKERS:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+            env=dict(env, WEB_WORKERS=str(workers), BIND=f"127.0.0.1:{PORT}"),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(f"{base}/availability/week?tenant={TENANT_ID}")
+            services = json.load(urllib.request.urlopen(f"{base}/availability/week?tenant={TENANT_ID}"))["services"]
+            for kind in ("availability", "booking"):
+                rps, errors = run_clients(kind, base, services[0]["id"])
+                print(f"{workers:>8} {kind:>14} {rps:>10.0f} {errors:>8}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
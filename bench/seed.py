@@ -0,0 +1,89 @@
+"""
+Siembra una BD local (SQLite o Postgres) con datos de prueba para los
+benchmarks: tenants, servicios, clientes y citas alrededor de hoy.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import insert
+
+from app.models import (
+    db, Tenant, Service, Customer, Appointment, DailyRollup, CalendarVersion,
+    ScheduleException, ChangeCounter, AppointmentTombstone, Job,
+)
+from app.utils.customer_stats import recompute_customer_stats
+from app.utils.rollups import rebuild_rollups
+
+DOMAIN = "demoagenda.shop"
+
+
+def tenant_ids(tenants):
+    return [f"bench{i}" for i in range(tenants)]
+
+
+def seed(tenants=3, services=8, customers=2000, appointments_per_day=20, days=45, rng_seed=1):
+    """
+    Crea `tenants` tenants; cada uno con `services` servicios, `customers`
+    clientes y `appointments_per_day` citas sin traslapes por día, desde
+    days/2 días atrás hasta days/2 adelante. Borra lo que haya de antes
+    para esos tenants.
+    """
+    rng = random.Random(rng_seed)
+    ids = tenant_ids(tenants)
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days // 2)
+
+    for table in (
+        DailyRollup, CalendarVersion, ScheduleException, ChangeCounter, AppointmentTombstone, Job,
+        Appointment, Customer, Service, Tenant,
+    ):
+        column = table.id if table is Tenant else table.tenant_id
+        db.session.query(table).filter(column.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+    db.session.execute(insert(Tenant), [
+        {"id": t, "name": t, "domain": f"{t}.{DOMAIN}",
+         "hours_start_week": "08:00", "hours_end_week": "22:00", "working_days": "0,1,2,3,4,5,6"}
+        for t in ids
+    ])
+
+    for t in ids:
+        service_rows = db.session.execute(
+            insert(Service).returning(
+                Service.id, Service.duration_minutes, Service.price, sort_by_parameter_order=True,
+            ),
+            [{"tenant_id": t, "name": f"Servicio {i}", "duration_minutes": rng.choice([15, 30, 45, 60]),
+              "price": rng.randint(100, 900)} for i in range(services)],
+        ).all()
+
+        customer_ids = db.session.execute(
+            insert(Customer).returning(Customer.id, sort_by_parameter_order=True),
+            [{"tenant_id": t, "phone": f"686{i:07d}", "phone_norm": f"686{i:07d}",
+              "name": f"Cliente {i}", "visits": 0}
+             for i in range(customers)],
+        ).scalars().all()
+
+        appts = []
+        for n in range(days):
+            day = first_day + timedelta(days=n)
+            cursor = datetime.combine(day, time(8, 0))
+            for _ in range(appointments_per_day):
+                service_id, duration, price = rng.choice(service_rows)
+                end = cursor + timedelta(minutes=duration)
+                if end.date() != day:
+                    break
+                appts.append({
+                    "tenant_id": t, "customer_id": rng.choice(customer_ids), "service_id": service_id,
+                    "date": day, "start_time": cursor.time(), "end_time": end.time(),
+                    "blocks": duration // 5, "price": price,
+                })
+                cursor = end + timedelta(minutes=rng.choice([0, 0, 15]))
+        if appts:
+            db.session.execute(insert(Appointment), appts)
+
+        # lo que en la app mantienen las escrituras de citas
+        recompute_customer_stats(t)
+        rebuild_rollups(t)
+
+    db.session.commit()
+    return ids
@@ -0,0 +1,122 @@
+"""
+CPU y memoria por fila al armar el JSON de un mes con 5,000 citas, con
+tres formas de leer:
+
+    orm      Appointment.query.all() + appointment_to_dict (objetos del ORM)
+    columns  db.session.query(*columnas) + appointment_to_dict
+    core     select() de Core + RowSerializer (lo que usan los listados)
+
+Uso:
+    python -m bench.serialize [--rows 5000] [--rounds 7]
+"""
+import argparse
+import gc
+import os
+import statistics
+import time
+import tracemalloc
+from datetime import date, datetime, time as dtime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.models import db, Tenant, Service, Customer, Appointment  # noqa: E402
+
+TENANT_ID = "bench"
+MONTH_START = date(2030, 1, 1)
+MONTH_END = date(2030, 2, 1)
+
+
+def seed(rows):
+    db.session.add(Tenant(id=TENANT_ID, name="Bench"))
+    db.session.add(Service(id=1, tenant_id=TENANT_ID, name="S", duration_minutes=30, price=100))
+    db.session.add(Customer(id=1, tenant_id=TENANT_ID, phone="6860000001", name="C", visits=0))
+    db.session.flush()
+
+    days = (MONTH_END - MONTH_START).days
+    per_day = -(-rows // days)
+    step = max(1, min(12, 14 * 60 // per_day))  # minutos entre citas, de 8:00 a 22:00
+    created = datetime(2029, 12, 1)
+    db.session.execute(insert(Appointment), [
+        {
+            "tenant_id": TENANT_ID, "customer_id": 1, "service_id": 1,
+            "date": MONTH_START + timedelta(days=i // per_day),
+            "start_time": dtime(*divmod(8 * 60 + (i % per_day) * step, 60)),
+            "end_time": dtime(*divmod(8 * 60 + (i % per_day) * step + step, 60)),
+            "blocks": 2, "price": 100,
+            "created_at": created + timedelta(seconds=i),
+        }
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def strategies():
+    from app.routes.admin import APPOINTMENT_COLUMNS, APPOINTMENT_ROWS, appointment_to_dict
+
+    a = Appointment.__table__.c
+    in_month = (a.tenant_id == TENANT_ID, a.date >= MONTH_START, a.date < MONTH_END)
+    order = (a.date, a.start_time, a.id)
+    orm_columns = [getattr(Appointment, c.name) for c in APPOINTMENT_COLUMNS]
+
+    def orm():
+        rows = Appointment.query.filter(*in_month).order_by(*order).all()
+        return [appointment_to_dict(r) for r in rows]
+
+    def columns():
+        rows = db.session.query(*orm_columns).filter(*in_month).order_by(*order).all()
+        return [appointment_to_dict(r) for r in rows]
+
+    def core():
+        rows = db.session.execute(select(*APPOINTMENT_COLUMNS).where(*in_month).order_by(*order))
+        return APPOINTMENT_ROWS.many(rows)
+
+    return {"orm": orm, "columns": columns, "core": core}
+
+
+def measure(fn, rounds):
+    """
+    (µs de CPU por fila (mediana), bytes por fila en el pico de memoria)
+    """
+    fn()  # calienta caché de SQL compilado
+    cpu = []
+    for _ in range(rounds):
+        db.session.expunge_all()
+        gc.collect()
+        started = time.process_time()
+        out = fn()
+        cpu.append(time.process_time() - started)
+    n = len(out)
+
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    out = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(cpu) / n * 1e6, peak / n, n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.serialize")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        seed(args.rows)
+
+        results = {name: measure(fn, args.rounds) for name, fn in strategies().items()}
+
+    base_cpu, base_mem, _ = results["orm"]
+    print(f"{'lectura':<10}{'filas':>7}{'CPU µs/fila':>14}{'mem B/fila':>13}{'vs orm':>9}")
+    for name, (cpu, mem, n) in results.items():
+        print(f"{name:<10}{n:>7}{cpu:>14.2f}{mem:>13.0f}{base_cpu / cpu:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Mide el arranque en frío de un worker: un proceso nuevo que importa
+app.main (construye la app) y atiende su primer request.
+
+Sale con error si la mediana pasa de STARTUP_TARGET_MS (default 1000 ms).
+
+Uso:
+    python -m bench.startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "1000"))
+RUNS = 5
+
+CHILD = """
+from app.main import app
+app.test_client().get("/tenants/me")
+"""
+
+
+def main():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+
+    times = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", CHILD], env=env, check=True)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    p50 = statistics.median(times)
+    print(f"arranque en frío p50: {p50:.0f} ms (objetivo {TARGET_MS:.0f} ms)")
+    if p50 > TARGET_MS:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Suite de benchmarks de todas las rutas contra una BD local sembrada.
+
+Para cada endpoint mide latencia p50/p95/p99, consultas SQL por request y
+memoria pico (tracemalloc), y lo guarda en un JSON. Si ya hay baseline,
+compara y sale con error cuando algo empeora más que el umbral.
+
+Uso:
+    python -m bench                              # SQLite en /tmp
+    DATABASE_URL=postgresql://... python -m bench
+    python -m bench --update-baseline            # guarda los resultados como baseline
+    python -m bench --only availability --rounds 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def scenarios(tenant, service_id):
+    """
+    (nombre, método, url, body). Las reservas usan un día distinto en cada
+    ronda para que siempre agenden.
+    """
+    today = datetime.utcnow().date()
+    month = today.strftime("%Y-%m")
+    week_start = today - timedelta(days=today.weekday())
+    booking_days = iter(range(400, 100000))
+
+    def booking_body():
+        day = today + timedelta(days=next(booking_days))
+        return {"phone": "6860000001", "service_id": service_id, "date": day.isoformat(), "start_time": "12:00"}
+
+    return [
+        ("tenants.me", "GET", f"/tenants/me?tenant={tenant}", None),
+        ("services.list", "GET", f"/services/?tenant={tenant}", None),
+        ("customers.check", "POST", f"/customers/check?tenant={tenant}", lambda: {"phone": "6860000001"}),
+        ("availability.week", "GET", f"/availability/week?tenant={tenant}", None),
+        ("availability.week.slots", "GET", f"/availability/week?tenant={tenant}&format=slots", None),
+        ("appointments.day", "GET", f"/appointments/day?tenant={tenant}&date={today}", None),
+        ("appointments.create", "POST", f"/appointments/?tenant={tenant}", booking_body),
+        ("admin.settings", "GET", f"/admin/settings?tenant={tenant}", None),
+        ("admin.services", "GET", f"/admin/services?tenant={tenant}", None),
+        ("admin.appointments.day", "GET", f"/admin/appointments/day?tenant={tenant}&date={today}", None),
+        ("admin.appointments.week", "GET", f"/admin/appointments/week?tenant={tenant}&start={week_start}", None),
+        ("admin.appointments.month", "GET", f"/admin/appointments/month?tenant={tenant}&month={month}", None),
+        ("admin.stats.weeks", "GET",
+         f"/admin/stats?tenant={tenant}&from={today - timedelta(days=90)}&to={today}&group=week", None),
+    ]
+
+
+def measure(engine, client, method, url, body, rounds):
+    from bench.queries import count_queries
+
+    latencies = []
+    queries = []
+    statuses = set()
+
+    # una vuelta de calentamiento (caché de tenants, compilación de SQL)
+    client.open(url, method=method, json=body() if body else None)
+
+    for _ in range(rounds):
+        payload = body() if body else None
+        with count_queries(engine) as q:
+            t0 = time.perf_counter()
+            res = client.open(url, method=method, json=payload)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        queries.append(q.count)
+        statuses.add(res.status_code)
+
+    # la memoria se mide aparte: tracemalloc hace todo más lento
+    payload = body() if body else None
+    tracemalloc.start()
+    client.open(url, method=method, json=payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "queries": round(statistics.mean(queries), 2),
+        "peak_kb": round(peak / 1024, 1),
+        "status": sorted(statuses),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Regresiones: p95 o memoria pico que crecen más de `threshold` (ratio)
+    o cualquier consulta SQL de más por request. En latencia además tiene
+    que empeorar al menos `min_delta_ms`, para no fallar por ruido en los
+    endpoints de 1-2 ms.
+    """
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if (cur["p95_ms"] > base["p95_ms"] * (1 + threshold)
+                and cur["p95_ms"] - base["p95_ms"] >= min_delta_ms):
+            problems.append(f"{name}: p95 {base['p95_ms']} -> {cur['p95_ms']} ms")
+        if cur["queries"] > base["queries"]:
+            problems.append(f"{name}: consultas {base['queries']} -> {cur['queries']}")
+        if cur["peak_kb"] > base["peak_kb"] * (1 + threshold):
+            problems.append(f"{name}: memoria {base['peak_kb']} -> {cur['peak_kb']} KB")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--services", type=int, default=8)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--appointments-per-day", type=int, default=20)
+    parser.add_argument("--days", type=int, default=45)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--only", help="solo escenarios que contengan este texto")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--output", help="dónde guardar los resultados (default: no se guardan)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="empeoramiento permitido en latencia/memoria (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="empeoramiento mínimo de p95 para contarlo como regresión")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.gettempdir(), "agenda_bench.db")
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app import create_app
+    from app.models import db, Service
+    from bench.seed import seed
+
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            db.create_all()
+        tenant = seed(args.tenants, args.services, args.customers,
+                      args.appointments_per_day, args.days)[0]
+        service_id = db.session.query(Service.id).filter_by(tenant_id=tenant).first()[0]
+        engine = db.engine
+
+    results = {}
+    for name, method, url, body in scenarios(tenant, service_id):
+        if args.only and args.only not in name:
+            continue
+        results[name] = measure(engine, client, method, url, body, args.rounds)
+        r = results[name]
+        print(f"{name:<28} p50 {r['p50_ms']:>7.2f}  p95 {r['p95_ms']:>7.2f}  p99 {r['p99_ms']:>7.2f} ms"
+              f"  q {r['queries']:>5}  mem {r['peak_kb']:>8.1f} KB  {r['status']}")
+
+    report = {
+        "meta": {
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":")[0],
+            "tenants": args.tenants,
+            "customers": args.customers,
+            "appointments_per_day": args.appointments_per_day,
+            "days": args.days,
+            "rounds": args.rounds,
+            "at": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"baseline guardado en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("sin baseline para comparar (usa --update-baseline)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+
+    problems = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for p in problems:
+        print(f"REGRESIÓN {p}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# Servidor de producción:
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# WEB_WORKERS / WEB_THREADS también definen el tamaño del pool de conexiones
+# de cada worker (ver app/config.engine_options).
+import os
+
+from app.config import WEB_WORKERS, WEB_THREADS
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = WEB_WORKERS
+threads = WEB_THREADS
+worker_class = "gthread"
+
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = 20
+keepalive = 5
+
+# recicla workers de vez en cuando (con jitter para que no sea a la vez)
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = "-"
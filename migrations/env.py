@@ -0,0 +1,53 @@
+from logging.config import fileConfig
+
+from alembic import context
+from flask import has_app_context
+
+from app import create_app
+from app.models import db
+
+config = context.config
+
+if config.config_file_name is not None and not config.attributes.get("skip_logging"):
+    fileConfig(config.config_file_name)
+
+target_metadata = db.metadata
+
+
+def run_migrations_offline():
+    """
+    Genera el SQL sin conectarse (alembic upgrade head --sql).
+    """
+    app = create_app()
+    context.configure(
+        url=app.config["SQLALCHEMY_DATABASE_URI"],
+        target_metadata=target_metadata,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # Si nos llaman desde run_migrations() ya hay app; si es el CLI de
+    # alembic, creamos una.
+    if has_app_context():
+        engine = db.engine
+    else:
+        app = create_app()
+        app.app_context().push()
+        engine = db.engine
+
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
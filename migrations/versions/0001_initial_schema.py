@@ -0,0 +1,79 @@
+"""esquema inicial
+
+Las BDs que ya existen se crearon con db.create_all(), así que cada tabla
+solo se crea si no está.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "tenants" not in existing:
+        op.create_table(
+            "tenants",
+            sa.Column("id", sa.String(50), primary_key=True),
+            sa.Column("name", sa.String(100)),
+            sa.Column("domain", sa.String(200), unique=True),
+            sa.Column("created_at", sa.DateTime),
+            sa.Column("phone", sa.String(20)),
+            sa.Column("address", sa.String(200)),
+            sa.Column("hours_start_week", sa.String(10)),
+            sa.Column("hours_end_week", sa.String(10)),
+            sa.Column("hours_start_sat", sa.String(10)),
+            sa.Column("hours_end_sat", sa.String(10)),
+            sa.Column("hours_start_sun", sa.String(10)),
+            sa.Column("hours_end_sun", sa.String(10)),
+            sa.Column("working_days", sa.String(50)),
+        )
+
+    if "services" not in existing:
+        op.create_table(
+            "services",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id")),
+            sa.Column("name", sa.String(100)),
+            sa.Column("duration_minutes", sa.Integer),
+            sa.Column("price", sa.Integer),
+        )
+
+    if "customers" not in existing:
+        op.create_table(
+            "customers",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id")),
+            sa.Column("phone", sa.String(20)),
+            sa.Column("name", sa.String(100)),
+            sa.Column("visits", sa.Integer),
+        )
+
+    if "appointments" not in existing:
+        op.create_table(
+            "appointments",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id")),
+            sa.Column("customer_id", sa.Integer, sa.ForeignKey("customers.id")),
+            sa.Column("service_id", sa.Integer, sa.ForeignKey("services.id")),
+            sa.Column("date", sa.Date),
+            sa.Column("start_time", sa.Time),
+            sa.Column("end_time", sa.Time),
+            sa.Column("blocks", sa.Integer),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+
+def downgrade():
+    op.drop_table("appointments")
+    op.drop_table("customers")
+    op.drop_table("services")
+    op.drop_table("tenants")
@@ -0,0 +1,110 @@
+"""índices para las consultas frecuentes
+
+- appointments (tenant_id, date, start_time): vistas de día/semana/mes,
+  disponibilidad y revisión de traslapes (también cubre (tenant_id, date)).
+- customers (tenant_id, phone) único: búsqueda de cliente al agendar.
+- services (tenant_id): listados de servicios.
+
+tenants.domain ya tiene índice por su restricción UNIQUE.
+
+En Postgres los índices se crean con CREATE INDEX CONCURRENTLY (fuera de
+transacción) para no bloquear escrituras en tablas grandes. Si un CREATE
+CONCURRENTLY falla deja un índice INVALID; hay que borrarlo y volver a
+correr la migración.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def merge_duplicate_customers():
+    """
+    Antes del índice único: junta los clientes repetidos por
+    (tenant_id, phone) en el de menor id, moviendo sus citas y sumando
+    sus visitas.
+    """
+    op.execute(sa.text("""
+        UPDATE appointments
+        SET customer_id = (
+            SELECT MIN(d.id)
+            FROM customers c
+            JOIN customers d ON d.tenant_id = c.tenant_id AND d.phone = c.phone
+            WHERE c.id = appointments.customer_id
+        )
+        WHERE customer_id IN (
+            SELECT c.id FROM customers c
+            WHERE EXISTS (
+                SELECT 1 FROM customers d
+                WHERE d.tenant_id = c.tenant_id AND d.phone = c.phone AND d.id < c.id
+            )
+        )
+    """))
+    op.execute(sa.text("""
+        UPDATE customers
+        SET visits = (
+            SELECT SUM(COALESCE(d.visits, 0))
+            FROM customers d
+            WHERE d.tenant_id = customers.tenant_id AND d.phone = customers.phone
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM customers d
+            WHERE d.tenant_id = customers.tenant_id AND d.phone = customers.phone
+              AND d.id > customers.id
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM customers d
+            WHERE d.tenant_id = customers.tenant_id AND d.phone = customers.phone
+              AND d.id < customers.id
+        )
+    """))
+    op.execute(sa.text("""
+        DELETE FROM customers
+        WHERE EXISTS (
+            SELECT 1 FROM customers d
+            WHERE d.tenant_id = customers.tenant_id AND d.phone = customers.phone
+              AND d.id < customers.id
+        )
+    """))
+
+
+def upgrade():
+    merge_duplicate_customers()
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_appointments_tenant_date_start",
+            "appointments",
+            ["tenant_id", "date", "start_time"],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "uq_customers_tenant_phone",
+            "customers",
+            ["tenant_id", "phone"],
+            unique=True,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_services_tenant_id",
+            "services",
+            ["tenant_id"],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_services_tenant_id", "services", postgresql_concurrently=True)
+        op.drop_index("uq_customers_tenant_phone", "customers", postgresql_concurrently=True)
+        op.drop_index("ix_appointments_tenant_date_start", "appointments", postgresql_concurrently=True)
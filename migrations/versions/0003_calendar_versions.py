@@ -0,0 +1,26 @@
+"""versiones por tenant + día para ETags de calendario
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "calendar_versions",
+        sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("date", sa.Date, primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("calendar_versions")
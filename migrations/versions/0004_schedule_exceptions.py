@@ -0,0 +1,27 @@
+"""días cerrados y horarios especiales por tenant
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "schedule_exceptions",
+        sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("date", sa.Date, primary_key=True),
+        sa.Column("start_time", sa.Time),
+        sa.Column("end_time", sa.Time),
+    )
+
+
+def downgrade():
+    op.drop_table("schedule_exceptions")
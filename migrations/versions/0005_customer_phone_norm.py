@@ -0,0 +1,123 @@
+"""teléfono normalizado y búsqueda de clientes
+
+- customers.phone_norm (solo dígitos, 10 del número nacional), llenado
+  para los clientes existentes; los que quedan repetidos por
+  (tenant_id, phone_norm) se juntan en el de menor id.
+- Índice único (tenant_id, phone_norm) con varchar_pattern_ops para
+  búsquedas exactas y por prefijo.
+- En Postgres, índices trigram (pg_trgm) sobre phone_norm y lower(name)
+  para búsquedas por subcadena.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+
+def normalize_phone(phone):
+    # copia de app/utils/phones.normalize_phone al momento de la migración
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if digits else None
+
+
+def backfill(bind):
+    customers = sa.table(
+        "customers", sa.column("id", sa.Integer), sa.column("phone", sa.String),
+        sa.column("phone_norm", sa.String),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(customers.c.id, customers.c.phone)
+            .where(customers.c.id > last_id)
+            .order_by(customers.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            customers.update()
+            .where(customers.c.id == sa.bindparam("cid"))
+            .values(phone_norm=sa.bindparam("norm")),
+            [{"cid": r.id, "norm": normalize_phone(r.phone)} for r in rows],
+        )
+        last_id = rows[-1].id
+
+
+def merge_duplicate_customers():
+    same = "d.tenant_id = {t}.tenant_id AND d.phone_norm = {t}.phone_norm"
+    op.execute(sa.text(f"""
+        UPDATE appointments
+        SET customer_id = (
+            SELECT MIN(d.id)
+            FROM customers c
+            JOIN customers d ON {same.format(t="c")}
+            WHERE c.id = appointments.customer_id
+        )
+        WHERE customer_id IN (
+            SELECT c.id FROM customers c
+            WHERE EXISTS (SELECT 1 FROM customers d WHERE {same.format(t="c")} AND d.id < c.id)
+        )
+    """))
+    op.execute(sa.text(f"""
+        UPDATE customers
+        SET visits = (
+            SELECT SUM(COALESCE(d.visits, 0)) FROM customers d WHERE {same.format(t="customers")}
+        )
+        WHERE EXISTS (SELECT 1 FROM customers d WHERE {same.format(t="customers")} AND d.id > customers.id)
+        AND NOT EXISTS (SELECT 1 FROM customers d WHERE {same.format(t="customers")} AND d.id < customers.id)
+    """))
+    op.execute(sa.text(f"""
+        DELETE FROM customers
+        WHERE EXISTS (SELECT 1 FROM customers d WHERE {same.format(t="customers")} AND d.id < customers.id)
+    """))
+
+
+def upgrade():
+    op.add_column("customers", sa.Column("phone_norm", sa.String(20)))
+    backfill(op.get_bind())
+    merge_duplicate_customers()
+
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_customers_tenant_phone_norm",
+            "customers",
+            ["tenant_id", "phone_norm"],
+            unique=True,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_ops={"phone_norm": "varchar_pattern_ops"},
+        )
+
+        if postgres:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_customers_phone_norm_trgm "
+                "ON customers USING gin (phone_norm gin_trgm_ops)"
+            )
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_customers_name_trgm "
+                "ON customers USING gin (lower(name) gin_trgm_ops)"
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        if op.get_bind().dialect.name == "postgresql":
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_customers_name_trgm")
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_customers_phone_norm_trgm")
+        op.drop_index("uq_customers_tenant_phone_norm", "customers", postgresql_concurrently=True)
+    op.drop_column("customers", "phone_norm")
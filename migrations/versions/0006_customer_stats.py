@@ -0,0 +1,61 @@
+"""estadísticas de clientes y precio por cita
+
+- appointments.price: precio del servicio al agendar (se llena con el
+  precio actual del servicio para las citas existentes).
+- customers.last_visit_date / next_appointment_date / lifetime_spend, más
+  visits recalculado desde las citas.
+- Índice appointments (customer_id, date).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("appointments", sa.Column("price", sa.Integer))
+    op.add_column("customers", sa.Column("last_visit_date", sa.Date))
+    op.add_column("customers", sa.Column("next_appointment_date", sa.Date))
+    op.add_column("customers", sa.Column("lifetime_spend", sa.Integer))
+
+    op.execute(sa.text("""
+        UPDATE appointments
+        SET price = (SELECT services.price FROM services WHERE services.id = appointments.service_id)
+    """))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_appointments_customer_date",
+            "appointments",
+            ["customer_id", "date"],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+    # mismo cálculo que app/utils/customer_stats.recompute_customer_stats
+    op.execute(sa.text("""
+        UPDATE customers SET
+            visits = (SELECT COUNT(*) FROM appointments a WHERE a.customer_id = customers.id),
+            lifetime_spend = (SELECT COALESCE(SUM(a.price), 0) FROM appointments a
+                              WHERE a.customer_id = customers.id),
+            last_visit_date = (SELECT MAX(a.date) FROM appointments a
+                               WHERE a.customer_id = customers.id AND a.date <= CURRENT_DATE),
+            next_appointment_date = (SELECT MIN(a.date) FROM appointments a
+                                     WHERE a.customer_id = customers.id AND a.date >= CURRENT_DATE)
+    """))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_appointments_customer_date", "appointments", postgresql_concurrently=True)
+    op.drop_column("customers", "lifetime_spend")
+    op.drop_column("customers", "next_appointment_date")
+    op.drop_column("customers", "last_visit_date")
+    op.drop_column("appointments", "price")
@@ -0,0 +1,46 @@
+"""totales diarios por tenant + servicio para los tableros
+
+Se llena con lo que ya existe; después lo mantienen las escrituras de
+citas (app/utils/rollups.py).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "daily_rollups",
+        sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("date", sa.Date, primary_key=True),
+        sa.Column("service_id", sa.Integer, primary_key=True),
+        sa.Column("bookings", sa.Integer, nullable=False),
+        sa.Column("booked_minutes", sa.Integer, nullable=False),
+        sa.Column("revenue", sa.Integer, nullable=False),
+    )
+
+    # mismo cálculo que app/utils/rollups.rebuild_rollups
+    if op.get_bind().dialect.name == "postgresql":
+        minutes = "EXTRACT(EPOCH FROM (end_time - start_time)) / 60"
+    else:
+        minutes = "(strftime('%s', end_time) - strftime('%s', start_time)) / 60"
+
+    op.execute(sa.text(f"""
+        INSERT INTO daily_rollups (tenant_id, date, service_id, bookings, booked_minutes, revenue)
+        SELECT tenant_id, date, service_id, COUNT(*),
+               COALESCE(SUM({minutes}), 0), COALESCE(SUM(price), 0)
+        FROM appointments
+        GROUP BY tenant_id, date, service_id
+    """))
+
+
+def downgrade():
+    op.drop_table("daily_rollups")
@@ -0,0 +1,48 @@
+"""cola de trabajos en segundo plano + índice para el escáner de recordatorios
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id")),
+        sa.Column("payload", sa.JSON, nullable=False),
+        sa.Column("status", sa.String(10), nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("max_attempts", sa.Integer, nullable=False),
+        sa.Column("run_at", sa.DateTime, nullable=False),
+        sa.Column("locked_at", sa.DateTime),
+        sa.Column("last_error", sa.Text),
+        sa.Column("dedupe_key", sa.String(200), unique=True),
+        sa.Column("created_at", sa.DateTime),
+    )
+    op.create_index("ix_jobs_status_run_at", "jobs", ["status", "run_at"])
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_appointments_date_start",
+            "appointments",
+            ["date", "start_time"],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_appointments_date_start", "appointments", postgresql_concurrently=True)
+    op.drop_index("ix_jobs_status_run_at", "jobs")
+    op.drop_table("jobs")
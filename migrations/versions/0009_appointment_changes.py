@@ -0,0 +1,67 @@
+"""número de cambio por cita, contador por tenant y tombstones de borrados
+
+Las citas existentes toman su id como número de cambio (crece igual que
+el contador) y cada tenant arranca su contador en el mayor de esos.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("appointments", sa.Column("change_seq", sa.BigInteger))
+    op.execute(sa.text("UPDATE appointments SET change_seq = id"))
+
+    op.create_table(
+        "change_counters",
+        sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("seq", sa.BigInteger, nullable=False),
+        sa.Column("purged_seq", sa.BigInteger, nullable=False),
+    )
+    op.execute(sa.text("""
+        INSERT INTO change_counters (tenant_id, seq, purged_seq)
+        SELECT tenant_id, MAX(change_seq), 0
+        FROM appointments
+        WHERE tenant_id IS NOT NULL
+        GROUP BY tenant_id
+    """))
+
+    op.create_table(
+        "appointment_tombstones",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=False),
+        sa.Column("tenant_id", sa.String(50), sa.ForeignKey("tenants.id")),
+        sa.Column("date", sa.Date),
+        sa.Column("change_seq", sa.BigInteger, nullable=False),
+        sa.Column("deleted_at", sa.DateTime),
+    )
+    op.create_index(
+        "ix_appointment_tombstones_tenant_change_seq",
+        "appointment_tombstones",
+        ["tenant_id", "change_seq"],
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_appointments_tenant_change_seq",
+            "appointments",
+            ["tenant_id", "change_seq"],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_appointments_tenant_change_seq", "appointments", postgresql_concurrently=True)
+    op.drop_index("ix_appointment_tombstones_tenant_change_seq", "appointment_tombstones")
+    op.drop_table("appointment_tombstones")
+    op.drop_table("change_counters")
+    op.drop_column("appointments", "change_seq")
@@ -0,0 +1,33 @@
+"""prefijo del nombre para la búsqueda de clientes
+
+Los índices trigram de 0005 no sirven para patrones de menos de 3
+letras: /customers/search busca por prefijo con 2 letras, y en Postgres
+eso usa (tenant_id, lower(name) varchar_pattern_ops).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_customers_tenant_name_prefix "
+            "ON customers (tenant_id, lower(name) varchar_pattern_ops)"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_customers_tenant_name_prefix")